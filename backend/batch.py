@@ -0,0 +1,114 @@
+import argparse
+import json
+import multiprocessing as mp
+import time
+import traceback
+from pathlib import Path
+
+import main
+import job_queue  # importable once main has put src on sys.path
+
+# ========== CONFIG ==========
+JOBS_DIR = Path("data/jobs")
+WORKERS = 1
+POLL_SEC = 30
+ERROR_TAIL = 4000
+# =============================
+
+
+def run_worker(db_path: str, wait: bool):
+    """Claim and run jobs until the queue is empty (or forever with wait)."""
+    worker = job_queue.worker_name()
+    while True:
+        job = job_queue.claim_job(worker, db_path)
+        if job is None:
+            if not wait:
+                print(f"[{worker}] Queue empty, exiting.")
+                return
+            time.sleep(POLL_SEC)
+            continue
+
+        job_id, info = job
+        print(f"\n🏀 [{worker}] Job {job_id}: {info.get('game_name')}")
+        # Every job gets its own metadata dir so workers never share
+        # pbp.json / clock_map.csv; clips still go to data/processed
+        metadata_dir = JOBS_DIR / str(job_id) / "metadata"
+        try:
+            with job_queue.Heartbeat(job_id, worker, db_path):
+                players, timings = main.run_game(info, metadata_dir,
+                                                 interactive=False)
+        except Exception:
+            error = traceback.format_exc()
+            print(f"❌ [{worker}] Job {job_id} failed:\n{error}")
+            if not job_queue.fail_job(job_id, worker, error[-ERROR_TAIL:],
+                                      db_path):
+                print(f"⚠️  [{worker}] Job {job_id} was reclaimed by another "
+                      f"worker, not recording the failure.")
+            continue
+
+        if not job_queue.finish_job(job_id, worker, timings, db_path):
+            print(f"⚠️  [{worker}] Job {job_id} was reclaimed by another "
+                  f"worker, not marking it done.")
+        main.print_summary(players, info["game_name"])
+
+
+def add_games(paths, db_path: str):
+    """Queue every game_info dict (or list of them) found in the files."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            games = json.load(f)
+        for info in games if isinstance(games, list) else [games]:
+            job_id = job_queue.add_job(info, db_path)
+            print(f"Queued job {job_id}: {info['game_name']}")
+
+
+def print_status(db_path: str):
+    jobs = job_queue.list_jobs(db_path)
+    if not jobs:
+        print("No jobs.")
+        return
+    for job in jobs:
+        info = json.loads(job["game_info"])
+        took = ""
+        if job["status"] == "done":
+            took = f"{job['finished'] - job['started']:.0f}s"
+        error = (job["error"] or "").strip().splitlines()
+        print(f"{job['id']:>4}  {job['status']:<8} try {job['attempts']}  "
+              f"{info.get('game_name', '?'):<30} {took:>6}  "
+              f"{job['worker'] or ''}  {error[-1] if error else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Season-scale batch runs over a SQLite job queue")
+    parser.add_argument("--db", default=job_queue.QUEUE_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Queue games from game_info JSON files")
+    add.add_argument("files", nargs="+")
+
+    work = sub.add_parser("work", help="Run worker processes")
+    work.add_argument("--workers", type=int, default=WORKERS)
+    work.add_argument("--wait", action="store_true",
+                      help="Keep polling for new jobs instead of exiting")
+
+    sub.add_parser("status", help="List jobs")
+    sub.add_parser("retry", help="Re-queue failed jobs")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        add_games(args.files, args.db)
+    elif args.command == "status":
+        print_status(args.db)
+    elif args.command == "retry":
+        print(f"Re-queued {job_queue.retry_failed(args.db)} jobs.")
+    elif args.workers <= 1:
+        run_worker(args.db, args.wait)
+    else:
+        ctx = mp.get_context("spawn")
+        procs = [ctx.Process(target=run_worker, args=(args.db, args.wait))
+                 for _ in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
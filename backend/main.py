@@ -1,111 +1,338 @@
 import os
 import json
-import subprocess
-from pathlib import Path
 import sys
+from pathlib import Path
+
+# Stages run in-process; the src modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+
+import cv2  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import artifact_cache  # noqa: E402
+import clean_clock_csv  # noqa: E402
+import cut_intervals  # noqa: E402
+import extract_clock_ocr  # noqa: E402
+import fetch_data  # noqa: E402
+import game_proxy  # noqa: E402
+import generate_highlights  # noqa: E402
+import keyframes  # noqa: E402
+import locate_clocks  # noqa: E402
+import parse_subs  # noqa: E402
+import pbp_events  # noqa: E402
+from clock_index import ClockIndex  # noqa: E402
+from pipeline import Stage, run_pipeline  # noqa: E402
+
+import upload_videos  # noqa: E402
 
 # ========== CONFIG ==========
 GAME_INFO_PATH = "game_info.json"
 PROCESSED_DIR = Path("data/processed")
+METADATA_DIR = Path("data/metadata")
+SAMPLE_RATE = 1
+# Upload clips to B2 as they are cut (game_info "upload" overrides)
+UPLOAD = False
+# Package stints and reels as HLS (fMP4) too (game_info "hls" overrides)
+HLS = False
+# "clips": cut every stint and reel into its own MP4; "proxy": encode one
+# web proxy of the game and index stints / highlights as times into it
+# (game_info "storage" overrides)
+STORAGE = "clips"
 # =============================
 
 
-def run_script(script_path: str, args=None):
-    """Run a Python script as a subprocess with optional args."""
-    cmd = [sys.executable, script_path]
-    if args:
-        cmd += args
-    print(f"\nRunning {script_path} {' '.join(args or [])}")
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"{script_path} failed with exit code {result.returncode}")
-    print(f"Finished {script_path}")
+def pick_roi(video_path: str):
+    """Get the clock ROI up front: the selection window needs the main thread."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"❌ Cannot open video: {video_path}")
+    try:
+        return list(extract_clock_ocr.select_roi(cap))
+    finally:
+        cap.release()
 
 
-def main():
-    if not os.path.exists(GAME_INFO_PATH):
-        raise FileNotFoundError(
-            "Missing game_info.json! Please create it first.")
-    with open(GAME_INFO_PATH, "r", encoding="utf-8") as f:
-        info = json.load(f)
+def player_folder(player_name: str, game_name: str):
+    return PROCESSED_DIR / player_name.replace(" ", "_") / game_name
 
-    player_name = info["player_name"]
+
+def run_game(info: dict, metadata_dir: Path = METADATA_DIR,
+             interactive: bool = True):
+    """
+    Run the whole pipeline for one game (the game_info.json fields).
+    Intermediate files go to metadata_dir, so concurrent runs can each use
+    their own. The clock ROI comes from info["roi"], the cache, or (when
+    interactive) the selection window.
+    Returns (players, timings); raises if a stage fails.
+    """
+    # "players": a list of names or "roster" (optionally one "team");
+    # falls back to the single "player_name"
+    players_spec = info.get("players") or [info["player_name"]]
+    team = info.get("team")
     game_name = info["game_name"]
     espn_id = str(info["espn_id"])
     video_path = info["video_path"]
+    # "full": OCR the whole game; "targeted": only search the clocks needed
+    clock_mode = info.get("clock_mode", "full")
+    upload = info.get("upload", UPLOAD)
+    hls = info.get("hls", HLS)
+    storage = info.get("storage", STORAGE)
 
     print("\nGAME INFO")
-    print(f"Player: {player_name}")
+    if players_spec == "roster":
+        print(f"Players: whole roster{f' ({team})' if team else ''}")
+    else:
+        print(f"Players: {', '.join(players_spec)}")
     print(f"Game:   {game_name}")
     print(f"ESPN ID: {espn_id}")
     print(f"Video:  {video_path}")
+    print(f"Clock:  {clock_mode}")
+    print(f"Upload: {'yes' if upload else 'no'}")
+    print(f"HLS:    {'yes' if hls else 'no'}")
+    print(f"Storage: {storage}")
+
+    metadata_dir = Path(metadata_dir)
+    metadata_dir.mkdir(parents=True, exist_ok=True)
+    raw_ocr_csv = metadata_dir / "clock_map.csv"
+    clean_ocr_csv = metadata_dir / "clock_map_clean.csv"
+    pbp_file = metadata_dir / "pbp.json"
+    subs = metadata_dir / "subs_intervals.csv"
+    roi_file = metadata_dir / "clock_roi.json"
+    extract_clock_ocr.ROI_JSON = str(roi_file)
+    keyframes.KEYFRAME_JSON = str(metadata_dir / "keyframes.json")
+
+    # Shared metadata files are restored from a cache keyed by what produced
+    # them (ESPN id, players, video content, ROI, code version), so a stale
+    # file from another game is never reused.
+    video_key = artifact_cache.video_digest(video_path)
+    roi_key = artifact_cache.make_key("roi", video=video_key)
+    pbp_key = artifact_cache.make_key("pbp", espn_id=espn_id)
+    subs_key = artifact_cache.make_key(
+        "subs", espn_id=espn_id, players=players_spec, team=team)
+    cached_roi = artifact_cache.load_json("roi", roi_key, roi_file.name)
+    roi = info.get("roi") or cached_roi
+    if roi is None:
+        if not interactive:
+            raise RuntimeError(
+                f"No clock ROI for {video_path}: add \"roi\": [x, y, w, h] "
+                "or select it once with main.py.")
+        roi = pick_roi(video_path)
+    roi = [int(v) for v in roi]
+    roi_file.write_text(json.dumps(roi), encoding="utf-8")
+    if roi != cached_roi:
+        artifact_cache.store("roi", roi_key, {roi_file.name: roi_file},
+                             {"video": video_path})
+
+    ocr_key = artifact_cache.make_key(
+        "ocr", video=video_key, roi=roi, sample_rate=SAMPLE_RATE,
+        clock_mode=clock_mode,
+        targets=subs_key if clock_mode == "targeted" else None)
+    clean_key = artifact_cache.make_key("clean", ocr=ocr_key)
+
+    def cached(kind, key, path, load, produce):
+        """Stage function that restores its file from the cache when it can."""
+        def run(**inputs):
+            if artifact_cache.fetch(kind, key, {path.name: path}):
+                print(f"Skipping {kind} ({kind} cache hit)")
+                return load(path)
+            result = produce(**inputs)
+            artifact_cache.store(kind, key, {path.name: path},
+                                 {"game": game_name, "video": video_path})
+            return result
+        return run
+
+    def fetch_pbp():
+        return fetch_data.fetch_game_data(espn_id, save_dir=str(pbp_file.parent))
+
+    def resolve_players(pbp):
+        names = players_spec
+        if players_spec == "roster":
+            names = fetch_data.roster_names(pbp, team)
+            if not names:
+                raise RuntimeError("No roster found in the ESPN boxscore.")
+        for name in names:
+            folder = player_folder(name, game_name)
+            for d in ["intervals", "stats", "metadata"]:
+                (folder / d).mkdir(parents=True, exist_ok=True)
+        print(f"Processing {len(names)} players: {', '.join(names)}")
+        return list(names)
+
+    def build_events(pbp, players):
+        table = pbp_events.build_event_table(
+            pbp_events.load_plays(pbp), players)
+        print(f"Indexed {len(table)} play-by-play events.")
+        return table
+
+    def parse_player_subs(events, players):
+        by_player = parse_subs.parse_roster_subs(events, players)
+        parse_subs.save_roster_subs(by_player, str(subs))
+        return pd.DataFrame(
+            [{"player": name, **i}
+             for name, intervals in by_player.items() for i in intervals],
+            columns=["player", "half", "start_clock", "end_clock"])
+
+    def read_clock(players=None, **_):
+        if clock_mode == "targeted":
+            return locate_clocks.locate_clocks(
+                video_path, players, subs_csv=str(subs),
+                pbp_json=str(pbp_file), output_csv=str(raw_ocr_csv), roi=roi)
+        return extract_clock_ocr.extract_clock_ocr(
+            video_path, output_csv=str(raw_ocr_csv), roi=roi)
 
-    player_folder = PROCESSED_DIR / player_name.replace(" ", "_") / game_name
-    intervals_dir = player_folder / "intervals"
-    stats_dir = player_folder / "stats"
-    metadata_dir = player_folder / "metadata"
-
-    for d in [intervals_dir, stats_dir, metadata_dir]:
-        d.mkdir(parents=True, exist_ok=True)
-
-    print(f"\nFolder structure ready at: {player_folder}")
-
-    scripts = [
-        ("src/fetch_data.py", ["--espn_id", espn_id]),
-        ("src/parse_subs.py", ["--player", player_name, "--espn_id", espn_id]),
-        ("src/extract_clock_ocr.py", ["--video", video_path]),
-        ("src/clean_clock_csv.py", []),
-        ("src/cut_intervals.py", [
-            "--player", player_name, "--game", game_name, "--video", video_path]),
-        ("src/generate_highlights.py", [
-            "--player", player_name, "--game", game_name, "--espn_id", espn_id, "--video", video_path]),
+    def clean_clock(ocr):
+        labeled = clean_clock_csv.clean_clock_rows(ocr, str(clean_ocr_csv))
+        return ClockIndex(pd.DataFrame(
+            labeled, columns=["video_time_sec", "clock_text", "half"]))
+
+    # Every clip is queued for upload the moment ffmpeg finishes it, so the
+    # transfer overlaps with the remaining cuts instead of following them
+    sync = upload_videos.make_sync() if upload else None
+    queue = upload_videos.UploadQueue(sync) if upload else None
+    on_done = upload_videos.publish_clip(queue) if upload else None
+
+    def pending(players, subdir):
+        """Output dirs (player -> dir) that have no clips yet."""
+        dirs = {name: player_folder(name, game_name) / subdir
+                for name in players}
+        done = [name for name, d in dirs.items() if any(d.glob("*.mp4"))]
+        if done:
+            print(f"Skipping {subdir} of {', '.join(done)} (already cut)")
+        return {name: str(d) for name, d in dirs.items() if name not in done}
+
+    def cut_stints(clock, subs, players):
+        todo = pending(players, "intervals")
+        if todo:
+            cut_intervals.VIDEO_PATH = video_path
+            cut_intervals.GAME_NAME = game_name
+            cut_intervals.HLS = hls
+            cut_intervals.cut_players(todo, clock, subs, on_done)
+
+    def cut_highlights(clock, events, players):
+        todo = pending(players, "stats")
+        if todo:
+            generate_highlights.VIDEO_PATH = video_path
+            generate_highlights.GAME_NAME = game_name
+            generate_highlights.HLS = hls
+            generate_highlights.cut_players(todo, clock, events, on_done)
+
+    def encode_proxy():
+        proxy = game_proxy.make_proxy(video_path,
+                                      game_proxy.proxy_path(game_name))
+        if queue:
+            queue.put(proxy, upload_videos.proxy_object_key(game_name))
+        return proxy
+
+    def index_stints(clock, subs, players):
+        duration = cut_intervals.get_video_duration(video_path)
+        return {name: cut_intervals.stint_times(
+            subs[subs["player"] == name], clock, duration) for name in players}
+
+    def plan_highlights(clock, events, players):
+        for name in players:
+            generate_highlights.plan_reels(
+                events, clock, name,
+                str(player_folder(name, game_name) / "stats"))
+
+    def write_time_indexes(stints, players, **_):
+        for name in players:
+            folder = player_folder(name, game_name)
+            game_proxy.write_time_index(
+                name, game_name, stints[name],
+                str(folder / "stats" / "windows.json"),
+                str(folder / "metadata" / game_proxy.TIME_INDEX))
+
+    # Targeted OCR searches for the sub/play clocks, so it waits for them;
+    # full OCR overlaps with the ESPN fetch and sub parsing. Every stage
+    # handles all players at once: one OCR pass, one play-by-play scan
+    # into the event table, one pooled cutting batch.
+    stages = [
+        Stage("pbp", cached("pbp", pbp_key, pbp_file,
+                            lambda p: json.loads(p.read_text("utf-8")),
+                            fetch_pbp)),
+        Stage("players", resolve_players, inputs=["pbp"]),
+        Stage("events", build_events, inputs=["pbp", "players"]),
+        Stage("subs", cached("subs", subs_key, subs, pd.read_csv,
+                             parse_player_subs), inputs=["events", "players"]),
+        Stage("ocr", cached("ocr", ocr_key, raw_ocr_csv,
+                            clean_clock_csv.read_clock_rows, read_clock),
+              inputs=["players", "subs"] if clock_mode == "targeted" else []),
+        Stage("clock", cached("clean", clean_key, clean_ocr_csv,
+                              ClockIndex.from_csv, clean_clock),
+              inputs=["ocr"]),
     ]
+    if storage == "proxy":
+        # Nothing is cut: the proxy encode only needs the video, so it runs
+        # alongside OCR, and clips become time ranges into it
+        stages += [
+            Stage("proxy", encode_proxy),
+            Stage("stints", index_stints, inputs=["clock", "subs", "players"]),
+            Stage("highlights", plan_highlights,
+                  inputs=["clock", "events", "players"]),
+            Stage("time_index", write_time_indexes,
+                  inputs=["stints", "players", "highlights", "proxy"]),
+        ]
+    else:
+        stages += [
+            Stage("intervals", cut_stints,
+                  inputs=["clock", "subs", "players"]),
+            Stage("highlights", cut_highlights,
+                  inputs=["clock", "events", "players"]),
+        ]
+
+    try:
+        artifacts, timings = run_pipeline(stages)
+    except Exception:
+        # Let queued uploads finish, but report the pipeline failure
+        if queue:
+            try:
+                queue.drain()
+            except Exception as e:
+                print(f"⚠️  {e}")
+        raise
+    uploaded = queue.drain() if queue else {}
+
+    if upload:
+        # Clips that were already cut (skipped stages) and the metadata go
+        # up now; each manifest is written only once all its objects landed
+        player_id = None if info.get("players") else info.get("player_id")
+        for name in artifacts["players"]:
+            uploaded = upload_videos.upload_player(
+                sync, name, game_name, metadata_dir, uploaded, player_id,
+                storage)
+    return artifacts["players"], timings
 
-    raw_ocr_csv = Path("data/metadata/clock_map.csv")
-    clean_ocr_csv = Path("data/metadata/clock_map_clean.csv")
-    pbp_file = Path("data/metadata/pbp.json")
-    subs = Path("data/metadata/subs_intervals.csv")
-
-    for script, args in scripts:
-        script_name = os.path.basename(script)
-
-        if script_name == "fetch_data.py" and pbp_file.exists():
-            print("Skipping fetch_data.py (play by play cache found)")
-            continue
-        if script_name == "parse_subs.py" and subs.exists():
-            print("Skipping parse_subs.py (subs intervals cache found)")
-            continue
-        if script_name == "extract_clock_ocr.py" and raw_ocr_csv.exists():
-            print("Skipping extract_clock_ocr.py (raw OCR cache found)")
-            continue
-        if script_name == "clean_clock_csv.py" and clean_ocr_csv.exists():
-            print("Skipping clean_clock_csv.py (clean OCR cache found)")
-            continue
-        if script_name == "cut_intervals.py" and intervals_dir.exists() and any(intervals_dir.glob("*.mp4")):
-            print("Skipping cut_intervals.py (intervals already cut)")
-            continue
-        if script_name == "generate_highlights.py" and stats_dir.exists() and any(stats_dir.glob("*.mp4")):
-            print("Skipping generate_highlights.py (stats already generated)")
-            continue
-
-        try:
-            run_script(script, args)
-        except Exception as e:
-            print(f"\nPipeline stopped: {e}")
-            break
-
-    interval_files = list(intervals_dir.glob("*.mp4"))
-    stat_files = list(stats_dir.glob("*.mp4"))
 
+def print_summary(players, game_name: str):
     print("\nSUMMARY")
-    print(f"Intervals found: {len(interval_files)}")
-    print(f"Stats clips:     {len(stat_files)}")
+    for name in players:
+        folder = player_folder(name, game_name)
+        interval_files = list((folder / "intervals").glob("*.mp4"))
+        stat_files = list((folder / "stats").glob("*.mp4"))
 
-    if len(interval_files) == 0:
-        print("No interval clips found! Check cut_intervals step.")
-    else:
-        print(f"Pipeline complete! Data ready in {player_folder}")
+        print(f"{name}: {len(interval_files)} intervals, "
+              f"{len(stat_files)} stats clips")
+        if len(interval_files) == 0:
+            print("  No interval clips found! Check cut_intervals step.")
+        else:
+            print(f"  Data ready in {folder}")
+
+
+def main():
+    if not os.path.exists(GAME_INFO_PATH):
+        raise FileNotFoundError(
+            "Missing game_info.json! Please create it first.")
+    with open(GAME_INFO_PATH, "r", encoding="utf-8") as f:
+        info = json.load(f)
+
+    try:
+        players, _ = run_game(info)
+    except Exception as e:
+        print(f"\nPipeline stopped: {e}")
+        players = info.get("players") or [info["player_name"]]
+        if players == "roster":
+            return
+
+    print_summary(players, info["game_name"])
 
 
 if __name__ == "__main__":
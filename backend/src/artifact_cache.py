@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+# ======= CONFIG =======
+CACHE_DIR = Path("data/cache")
+MAX_CACHE_BYTES = 20 * 1024 ** 3
+# Bump when OCR / parsing output changes so old entries stop matching
+CODE_VERSION = "1"
+HASH_SAMPLES = 16
+HASH_CHUNK = 1024 * 1024
+# ======================
+
+
+def video_digest(path: str):
+    """
+    Content hash of a video: file size plus HASH_SAMPLES evenly spaced
+    1 MiB chunks. Reading a few MB instead of the whole multi-GB file keeps
+    this instant while still telling different recordings apart.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        for i in range(HASH_SAMPLES):
+            f.seek(max(0, size - HASH_CHUNK) * i // max(1, HASH_SAMPLES - 1))
+            h.update(f.read(HASH_CHUNK))
+    return h.hexdigest()[:32]
+
+
+def make_key(kind: str, **parts):
+    """Stable key for an artifact of `kind` built from its inputs."""
+    payload = json.dumps({"kind": kind, "version": CODE_VERSION, **parts},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def entry_dir(kind: str, key: str):
+    return CACHE_DIR / kind / key
+
+
+def fetch(kind: str, key: str, files: dict):
+    """
+    Copy a cached entry's files to their destinations.
+    files maps the stored file name to the destination Path.
+    Returns False (and copies nothing) unless every file is cached.
+    """
+    if not key:
+        return False
+    entry = entry_dir(kind, key)
+    if not all((entry / name).exists() for name in files):
+        return False
+
+    for name, dest in files.items():
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(entry / name, dest)
+    _touch(entry)
+    return True
+
+
+def store(kind: str, key: str, files: dict, meta: dict = None):
+    """Save files (name -> source Path) as a cache entry, then evict."""
+    if not key or not all(Path(src).exists() for src in files.values()):
+        return False
+
+    entry = entry_dir(kind, key)
+    # Per-process temp dir: several workers may share the cache directory
+    tmp = entry.with_name(f".{key}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, src in files.items():
+        shutil.copyfile(src, tmp / name)
+    (tmp / "meta.json").write_text(json.dumps(
+        {"kind": kind, "key": key, "created": time.time(), **(meta or {})},
+        indent=2, default=str), encoding="utf-8")
+
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another worker stored the entry in between: same key, same content
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not entry.is_dir():
+            raise
+    _touch(entry)
+    evict()
+    return True
+
+
+def load_json(kind: str, key: str, name: str):
+    """Return a cached JSON file's content, or None."""
+    path = entry_dir(kind, key) / name
+    if not key or not path.exists():
+        return None
+    _touch(path.parent)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _touch(entry: Path):
+    try:
+        (entry / ".last_used").write_text(str(time.time()), encoding="utf-8")
+    except FileNotFoundError:
+        pass  # evicted by another worker meanwhile
+
+
+def evict(max_bytes: int = MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits max_bytes."""
+    if not CACHE_DIR.exists():
+        return
+
+    entries = []
+    for kind_dir in CACHE_DIR.iterdir():
+        if not kind_dir.is_dir():
+            continue
+        for entry in kind_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                size = sum(p.stat().st_size for p in entry.rglob("*")
+                           if p.is_file())
+                marker = entry / ".last_used"
+                used = marker.stat().st_mtime if marker.exists() \
+                    else entry.stat().st_mtime
+            except FileNotFoundError:
+                continue  # replaced or evicted by another worker meanwhile
+            entries.append((used, size, entry))
+
+    total = sum(size for _, size, _ in entries)
+    for used, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        print(f"Evicted cache entry {entry.parent.name}/{entry.name}")
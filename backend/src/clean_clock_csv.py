@@ -105,12 +105,9 @@ def label_periods(cleaned_rows):
     return labeled
 
 
-def main():
-    if not os.path.exists(INPUT_CSV):
-        raise FileNotFoundError(f"Input file not found: {INPUT_CSV}")
-
-    print(f"Loading {INPUT_CSV}...")
-    with open(INPUT_CSV, newline="", encoding="utf-8") as f:
+def read_clock_rows(path: str):
+    """Load (video_time_sec, clock_text) rows from a raw OCR CSV."""
+    with open(path, newline="", encoding="utf-8") as f:
         reader = csv.reader(f)
         _header = next(reader, None)
         rows = []
@@ -121,20 +118,33 @@ def main():
                 except:
 
                     continue
+    return rows
+
 
+def clean_clock_rows(rows, output_csv: str = OUTPUT_CSV):
+    """Clean and period-label raw OCR rows, save them and return them."""
     print(f"Cleaning {len(rows)} entries...")
     cleaned = smart_clean_sequence(rows)
     print(f"Kept {len(cleaned)} entries ({len(rows)-len(cleaned)} removed).")
 
     labeled = label_periods(cleaned)
 
-    os.makedirs(os.path.dirname(OUTPUT_CSV), exist_ok=True)
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["video_time_sec", "clock_text", "half"])
         writer.writerows(labeled)
 
-    print(f"Saved labeled CSV → {OUTPUT_CSV}")
+    print(f"Saved labeled CSV → {output_csv}")
+    return labeled
+
+
+def main():
+    if not os.path.exists(INPUT_CSV):
+        raise FileNotFoundError(f"Input file not found: {INPUT_CSV}")
+
+    print(f"Loading {INPUT_CSV}...")
+    clean_clock_rows(read_clock_rows(INPUT_CSV), OUTPUT_CSV)
 
 
 if __name__ == "__main__":
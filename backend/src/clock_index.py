@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# ======= CONFIG =======
+HALF_LABELS = {1: "1st Half", 2: "2nd Half", 3: "Overtime 1", 4: "Overtime 2"}
+# ======================
+
+
+def clock_to_seconds(clock_str):
+    """Convert 'M:SS' or 'SS.f' to seconds remaining in the period."""
+    if isinstance(clock_str, (int, float)):
+        return float(clock_str)
+    clock_str = str(clock_str)
+    if ":" in clock_str:
+        m, s = clock_str.split(":")
+        return float(m) * 60.0 + float(s)
+    return float(clock_str)
+
+
+class ClockIndex:
+    """
+    Clock -> video time lookups over clock_map_clean.csv.
+
+    Built once: for every half the readings are stably sorted by clock
+    value and collapsed to one entry per distinct value, keeping the
+    earliest reading. A lookup then is a searchsorted over that array and
+    returns exactly what a nearest-value scan of the half would (ties go to
+    the earlier row), without touching pandas.
+    """
+
+    def __init__(self, clock_df: pd.DataFrame):
+        self.halves = {}
+        has_half = "half" in clock_df
+        groups = clock_df.groupby("half", sort=False) if has_half \
+            else [(None, clock_df)]
+
+        for half, seg in groups:
+            vals = np.array([clock_to_seconds(c) for c in seg["clock_text"]])
+            times = seg["video_time_sec"].to_numpy(dtype=float)
+            rows = np.arange(len(seg))
+
+            order = np.argsort(vals, kind="stable")
+            vals, times, rows = vals[order], times[order], rows[order]
+            uniq, first = np.unique(vals, return_index=True)
+            self.halves[half] = (uniq, times[first], rows[first])
+
+    @classmethod
+    def from_csv(cls, path: str):
+        return cls(pd.read_csv(path))
+
+    def _segment(self, half_label):
+        if None in self.halves:
+            return self.halves[None]
+        return self.halves.get(half_label)
+
+    def lookup_many(self, targets, half_label=None, interpolate=False):
+        """
+        Vectorized lookup of many clock values within one half.
+        Returns (video_times, deltas) arrays, where delta is the matched
+        clock value minus the target, or (None, None) if the half is empty.
+        With interpolate=True, targets falling between two readings get a
+        linearly interpolated video time (and a delta of 0).
+        """
+        seg = self._segment(half_label)
+        if seg is None or len(seg[0]) == 0:
+            return None, None
+        vals, times, rows = seg
+
+        targets = np.asarray([clock_to_seconds(t) for t in targets], float)
+        hi = np.clip(np.searchsorted(vals, targets), 0, len(vals) - 1)
+        lo = np.clip(hi - 1, 0, len(vals) - 1)
+
+        d_lo = np.abs(vals[lo] - targets)
+        d_hi = np.abs(vals[hi] - targets)
+        pick_lo = (d_lo < d_hi) | ((d_lo == d_hi) & (rows[lo] < rows[hi]))
+        best = np.where(pick_lo, lo, hi)
+
+        video_times = times[best]
+        deltas = vals[best] - targets
+
+        if interpolate:
+            inside = (vals[lo] < targets) & (targets < vals[hi])
+            span = vals[hi] - vals[lo]
+            frac = np.divide(targets - vals[lo], span,
+                             out=np.zeros_like(targets), where=span > 0)
+            interp = times[lo] + frac * (times[hi] - times[lo])
+            video_times = np.where(inside, interp, video_times)
+            deltas = np.where(inside, 0.0, deltas)
+
+        return video_times, deltas
+
+    def lookup(self, target, half_label=None, interpolate=False):
+        """Return (video_time, delta) for one clock value, or (None, None)."""
+        times, deltas = self.lookup_many([target], half_label, interpolate)
+        if times is None:
+            return None, None
+        return float(times[0]), float(deltas[0])
+
+    def lookup_period(self, target, period, interpolate=False):
+        """Like lookup() but takes the ESPN period number."""
+        return self.lookup(target, HALF_LABELS.get(period), interpolate)
+
+    def align(self, targets, half_labels, interpolate=False):
+        """
+        Look up many (clock, half) pairs in one call.
+        Returns (video_times, deltas) float arrays aligned with the inputs,
+        NaN where the half has no readings.
+        """
+        targets, half_labels = list(targets), list(half_labels)
+        video_times = np.full(len(targets), np.nan)
+        deltas = np.full(len(targets), np.nan)
+
+        for half in set(half_labels):
+            idx = [i for i, h in enumerate(half_labels) if h == half]
+            times, diffs = self.lookup_many(
+                [targets[i] for i in idx], half, interpolate)
+            if times is not None:
+                video_times[idx] = times
+                deltas[idx] = diffs
+        return video_times, deltas
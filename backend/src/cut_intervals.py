@@ -1,9 +1,15 @@
+import math
 import pandas as pd
 import subprocess
 import os
-from tqdm import tqdm
 import argparse
 import json
+import shutil
+from tempfile import mkdtemp
+from clock_index import ClockIndex
+from ffmpeg_jobs import run_jobs, JOBS
+from hls_package import with_hls
+from keyframes import load_keyframes, plan_cut, cut_commands, probe_source
 
 # ======= CONFIG =======
 CLOCK_CSV = "data/metadata/clock_map_clean.csv"
@@ -13,20 +19,15 @@ PLAYER_NAME = None
 GAME_NAME = None
 FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
 FFPROBE_PATH = r"C:\ffmpeg\bin\ffprobe.exe"
+MAX_JOBS = JOBS
+# Frame-accurate starts: copy from a nearby keyframe, otherwise re-encode
+# only the head up to the next keyframe
+SMART_CUT = False
+# Also remux every clip into HLS (fMP4 segments) right after it is cut
+HLS = False
 # ======================
 
 
-def clock_to_seconds(clock_str):
-    """Convert 'M:SS' or 'SS.f' to seconds remaining in the period."""
-    if isinstance(clock_str, (int, float)):
-        return float(clock_str)
-    clock_str = str(clock_str)
-    if ":" in clock_str:
-        m, s = clock_str.split(":")
-        return float(m) * 60.0 + float(s)
-    return float(clock_str)
-
-
 def get_video_duration(video_path):
     """Return duration of the video in seconds (float)."""
     cmd = [
@@ -43,41 +44,27 @@ def get_video_duration(video_path):
     return float(data["format"]["duration"])
 
 
-def find_video_time_in_half(clock_df, target_clock, half_label):
-    """Find video time for target clock within the given half."""
-    target_val = clock_to_seconds(target_clock)
-    seg = clock_df[clock_df["half"] == half_label]
-    if seg.empty:
-        return None
-
-    seg = seg.assign(clock_val=seg["clock_text"].apply(clock_to_seconds))
-    seg = seg.assign(diff=(seg["clock_val"] - target_val).abs())
-
-    best = seg.nsmallest(1, "diff").iloc[0]
-    return float(best["video_time_sec"])
-
+def stint_times(intervals, clock_index, video_duration):
+    """
+    Video start/end (seconds) of one player's stints.
+    Returns [{"n", "half", "start_clock", "end_clock", "start", "end"}];
+    stints whose clocks could not be found are left out.
+    """
+    halves = list(intervals["half"]) * 2
+    clocks = list(intervals["start_clock"]) + list(intervals["end_clock"])
+    aligned, _ = clock_index.align(clocks, halves)
+    starts = aligned[:len(intervals)]
+    ends = aligned[len(intervals):]
 
-def main(output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-
-    clock_df = pd.read_csv(CLOCK_CSV)
-    subs_df = pd.read_csv(SUBS_CSV)
-    intervals = subs_df[subs_df["player"] == PLAYER_NAME].copy()
-
-    # Get full video duration once
-    video_duration = get_video_duration(VIDEO_PATH)
-
-    print(f"Cutting {len(intervals)} intervals for {PLAYER_NAME}...\n")
-
-    for i, row in tqdm(intervals.iterrows(), total=len(intervals),
-                       desc="Processing intervals", ncols=80):
+    stints = []
+    for i, (_, row) in enumerate(intervals.iterrows()):
 
         half_label = row["half"]
         start_clock = row["start_clock"]
         end_clock = row["end_clock"]
 
-        start_time = find_video_time_in_half(clock_df, start_clock, half_label)
-        end_time = find_video_time_in_half(clock_df, end_clock, half_label)
+        start_time = None if math.isnan(starts[i]) else float(starts[i])
+        end_time = None if math.isnan(ends[i]) else float(ends[i])
 
         # Add +3 seconds buffer to end if found
         if end_time is not None:
@@ -108,21 +95,66 @@ def main(output_dir):
         # Clamp end_time to the actual video length
         end_time = min(end_time, video_duration)
 
-        clip_name = f"stint_{i + 1}.mp4"
-        clip_path = os.path.join(output_dir, clip_name)
+        stints.append({"n": i + 1, "half": str(half_label),
+                       "start_clock": start_clock, "end_clock": end_clock,
+                       "start": start_time, "end": end_time})
+    return stints
+
+
+def stint_jobs(intervals, clock_index, video_duration, output_dir,
+               keyframes, temp_dir, source=None):
+    """Return the cut jobs (clip path -> ffmpeg commands) of one player."""
+    jobs = {}
+    for stint in stint_times(intervals, clock_index, video_duration):
+        clip_path = os.path.join(output_dir, f"stint_{stint['n']}.mp4")
+        plan = plan_cut(keyframes, stint["start"], stint["end"])
+        jobs[clip_path] = cut_commands(FFMPEG_PATH, VIDEO_PATH, plan,
+                                       clip_path, temp_dir, source)
+    return jobs
+
+
+def cut_players(players: dict, clock_index=None, subs_df=None,
+                on_done=None):
+    """
+    Cut the stints of several players (name -> output dir) in one pooled
+    batch; in-memory inputs skip re-reading the CSVs. on_done(path, result)
+    is called as each stint file is finished.
+    """
+    if clock_index is None:
+        clock_index = ClockIndex.from_csv(CLOCK_CSV)
+    if subs_df is None:
+        subs_df = pd.read_csv(SUBS_CSV)
+
+    # Get full video duration once
+    video_duration = get_video_duration(VIDEO_PATH)
+    keyframes = load_keyframes(VIDEO_PATH, FFPROBE_PATH) if SMART_CUT else []
+    source = probe_source(VIDEO_PATH, FFPROBE_PATH) if SMART_CUT else None
+    temp_dir = mkdtemp(prefix="stints_")
+
+    jobs = {}
+    for player_name, output_dir in players.items():
+        os.makedirs(output_dir, exist_ok=True)
+        intervals = subs_df[subs_df["player"] == player_name]
+        print(f"Cutting {len(intervals)} intervals for {player_name}...\n")
+        jobs.update(stint_jobs(intervals, clock_index, video_duration,
+                               output_dir, keyframes, temp_dir, source))
+
+    if HLS:
+        jobs = with_hls(jobs, FFMPEG_PATH)
+    try:
+        results = run_jobs(jobs, max_workers=MAX_JOBS,
+                           desc="Cutting intervals", on_done=on_done)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    for player_name, output_dir in players.items():
+        ok = sum(1 for path, r in results.items() if r["returncode"] == 0
+                 and os.path.dirname(path) == output_dir)
+        print(f"\nDone! {ok} intervals saved in {output_dir}")
 
-        cmd = [
-            FFMPEG_PATH, "-y",
-            "-ss", f"{start_time:.3f}",
-            "-to", f"{end_time:.3f}",
-            "-i", VIDEO_PATH,
-            "-c", "copy",
-            clip_path
-        ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL,
-                       stderr=subprocess.DEVNULL)
 
-    print(f"\nDone! {len(intervals)} intervals saved in {output_dir}")
+def main(output_dir, clock_index=None, subs_df=None):
+    cut_players({PLAYER_NAME: output_dir}, clock_index, subs_df)
 
 
 if __name__ == "__main__":
@@ -130,11 +162,20 @@ if __name__ == "__main__":
     parser.add_argument("--player", required=True)
     parser.add_argument("--game", required=True)
     parser.add_argument("--video", required=True)
+    parser.add_argument("--jobs", type=int, default=JOBS,
+                        help="Concurrent ffmpeg processes")
+    parser.add_argument("--hls", action="store_true", default=HLS,
+                        help="Package clips as HLS for fast-start streaming")
+    parser.add_argument("--smart_cut", action="store_true", default=SMART_CUT,
+                        help="Keyframe-aware cuts with accurate starts")
     args = parser.parse_args()
 
     PLAYER_NAME = args.player
     GAME_NAME = args.game
     VIDEO_PATH = args.video
+    MAX_JOBS = args.jobs
+    SMART_CUT = args.smart_cut
+    HLS = args.hls
 
     OUTPUT_DIR = os.path.join(
         "data", "processed",
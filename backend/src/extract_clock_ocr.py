@@ -1,14 +1,50 @@
 import cv2
 import easyocr
+import numpy as np
 import csv
+import json
 import os
 import re
 import argparse
+import subprocess
+import time
+import multiprocessing as mp
+from glyph_ocr import GlyphBank, LEARN_CONF
+from clean_clock_csv import clock_to_seconds
 
 # ======= CONFIG =======
 USE_MANUAL_ROI = True
 START_SEC = 30
 CLOCK_ROI = None
+ROI_JSON = "data/metadata/clock_roi.json"
+# "grab": demux every frame but only retrieve (convert) the sampled ones
+# "seek": jump straight to each sampled frame (wins when the interval spans
+#         several GOPs, e.g. sample_rate >= 2-3 s on broadcast encodes)
+# "pipe": ffmpeg selects, crops and grays the sampled frames itself and
+#         streams only ROI-sized frames, never full frames, into Python
+SAMPLING_MODE = "grab"
+FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+WORKERS = 1
+# > 0: skip text detection and recognize the whole ROI, `OCR_BATCH_SIZE`
+# crops per recognizer call. 0 keeps the per-frame readtext() path.
+OCR_BATCH_SIZE = 0
+CLOCK_ALLOWLIST = "0123456789:."
+# Mean absolute difference (0-255) between the binarized ROI and the last
+# OCR'd one below which the previous reading is reused. 0 disables gating.
+CHANGE_THRESHOLD = 1.0
+# "easyocr": EasyOCR on every OCR'd crop
+# "glyph":   digit templates learned from confident EasyOCR readings,
+#            falling back to EasyOCR on low-confidence matches
+OCR_BACKEND = "easyocr"
+# > 0: read the clock every COARSE_SEC seconds, fill gaps that match the
+# running/stopped clock model and bisect only where they do not
+COARSE_SEC = 0
+RUN_TOLERANCE = 1.5
+# Readings are streamed to per-chunk part files next to the output CSV,
+# with a checkpoint saved at most every CHECKPOINT_SEC; a re-run resumes
+# after the last checkpointed frame
+CHECKPOINT_SEC = 30
+PROGRESS_SEC = 15
 # ======================
 
 
@@ -48,26 +84,122 @@ def normalize_clock(raw: str):
     return None
 
 
-def extract_clock_ocr(video_path: str,
-                      output_csv: str = "data/metadata/clock_map.csv",
-                      sample_rate: int = 1):
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"❌ Cannot open video: {video_path}")
+def sample_frames(cap, start_frame: int, end_frame: int,
+                  frame_interval: int, mode: str, stats: dict):
+    """
+    Yield (frame_id, frame) for every sampled frame in [start_frame, end_frame).
+    frame_id follows CAP_PROP_POS_FRAMES after the read, so a frame is sampled
+    when frame_id % frame_interval == 0.
+    Only sampled frames are retrieved into BGR arrays; `stats` counts
+    grabbed (demuxed/decoded) vs retrieved (used) frames.
+    """
+    if mode == "seek":
+        first = start_frame - start_frame % frame_interval + frame_interval
+        for frame_id in range(first, end_frame + 1, frame_interval):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id - 1)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            stats["grabbed"] += 1
+            stats["retrieved"] += 1
+            yield frame_id, frame
+        return
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = total_frames / fps
-    print(f"🎥 Loaded video ({duration/60:.1f} min, {fps:.1f} fps)")
+    if mode != "grab":
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frame_id = start_frame
+    while frame_id < end_frame:
+        if not cap.grab():
+            break
+        frame_id += 1
+        stats["grabbed"] += 1
+        if frame_id % frame_interval != 0:
+            continue
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        stats["retrieved"] += 1
+        yield frame_id, frame
 
+
+def pipe_frames(video_path: str, roi, fps: float, start_frame: int,
+                end_frame: int, frame_interval: int, stats: dict):
+    """
+    Yield (frame_id, gray_roi) for the same sampled frames as
+    sample_frames(), decoded by an ffmpeg rawvideo pipe: the select, crop
+    and format=gray filters run inside ffmpeg, and each w*h frame is read
+    into one preallocated buffer (valid until the next iteration).
+    """
+    x, y, w, h = roi
+    first = start_frame - start_frame % frame_interval + frame_interval
+    count = len(range(first, end_frame + 1, frame_interval))
+    if count == 0:
+        return
+
+    # Frame n after the seek is frame_id start_frame + n + 1
+    offset = (start_frame + 1) % frame_interval
+    vf = (f"select='not(mod(n+{offset},{frame_interval}))',"
+          f"crop={w}:{h}:{x}:{y}:exact=1,format=gray")
+    cmd = [FFMPEG_PATH, "-v", "error", "-nostdin"]
+    if start_frame > 0:
+        cmd += ["-ss", f"{start_frame / fps:.6f}"]
+    cmd += ["-i", video_path, "-map", "0:v:0", "-an", "-vf", vf,
+            "-vsync", "0", "-frames:v", str(count),
+            "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"]
+
+    buf = np.empty((h, w), np.uint8)
+    view = memoryview(buf).cast("B")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, bufsize=0)
+    try:
+        for frame_id in range(first, end_frame + 1, frame_interval):
+            got = 0
+            while got < len(view):
+                n = proc.stdout.readinto(view[got:])
+                if not n:
+                    break
+                got += n
+            if got < len(view):
+                break
+            stats["grabbed"] += 1
+            stats["retrieved"] += 1
+            yield frame_id, buf
+
+        proc.wait()
+        if proc.returncode != 0:
+            err = proc.stderr.read().decode(errors="replace")
+            raise RuntimeError(f"ffmpeg pipe failed: {err[-600:]}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def parse_roi(text: str):
+    """Parse an 'x,y,w,h' command-line ROI."""
+    x, y, w, h = [int(v) for v in text.split(",")]
+    return x, y, w, h
+
+
+def select_roi(cap, roi=None):
+    """
+    Return the clock ROI (x, y, w, h): the given one, else ask the user if
+    USE_MANUAL_ROI, else CLOCK_ROI. The ROI used is saved to ROI_JSON so
+    the pipeline can reuse it for this video.
+    """
     cap.set(cv2.CAP_PROP_POS_MSEC, START_SEC * 1000)
 
     ret, frame = cap.read()
     if not ret:
         raise RuntimeError("Could not read frame at 30s mark.")
 
-    if USE_MANUAL_ROI:
+    if roi is not None:
+        x, y, w, h = roi
+        print(f"✅ Using given ROI: x={x}, y={y}, w={w}, h={h}")
+    elif USE_MANUAL_ROI:
         print("🖱 Select ROI window and press ENTER.")
         r = cv2.selectROI("Select Clock Region", frame)
         cv2.destroyWindow("Select Clock Region")
@@ -76,44 +208,361 @@ def extract_clock_ocr(video_path: str,
         x, y, w, h = CLOCK_ROI
         print(f"✅ Using predefined ROI: x={x}, y={y}, w={w}, h={h}")
 
-    reader = easyocr.Reader(["en"], gpu=True)
-    frame_interval = int(fps * sample_rate)
-    results = []
+    os.makedirs(os.path.dirname(ROI_JSON), exist_ok=True)
+    with open(ROI_JSON, "w", encoding="utf-8") as f:
+        json.dump([x, y, w, h], f)
+    return x, y, w, h
 
-    cap.set(cv2.CAP_PROP_POS_MSEC, START_SEC * 1000)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+def preprocess_roi(frame, roi):
+    """Crop the clock region and binarize it for OCR."""
+    x, y, w, h = roi
+    return preprocess_gray(
+        cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY))
 
-        frame_id = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-        if frame_id % frame_interval != 0:
-            continue
 
-        roi = frame[y:y+h, x:x+w]
-        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        gray = cv2.resize(gray, None, fx=2, fy=2,
-                          interpolation=cv2.INTER_CUBIC)
-        gray = cv2.GaussianBlur(gray, (3, 3), 0)
-        _, gray = cv2.threshold(
-            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-        text = reader.readtext(gray, detail=0)
-        clock_text = None
-        for t in text:
-            clock_text = normalize_clock(t)
-            if clock_text:
-                break
+def preprocess_gray(gray):
+    """Binarize an already cropped grayscale clock region for OCR."""
+    gray = cv2.resize(gray, None, fx=2, fy=2,
+                      interpolation=cv2.INTER_CUBIC)
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    _, gray = cv2.threshold(
+        gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return gray
 
+
+def read_clock(reader, gray):
+    """
+    Run EasyOCR on a preprocessed crop.
+    Returns (clock, confidence) for the first valid clock, else (None, 0).
+    """
+    for _, t, conf in reader.readtext(gray):
+        clock_text = normalize_clock(t)
+        if clock_text:
+            return clock_text, conf
+    return None, 0.0
+
+
+def roi_changed(crop, last_crop, threshold: float):
+    """True if the binarized crop differs enough from the last OCR'd one."""
+    if threshold <= 0 or last_crop is None or crop.shape != last_crop.shape:
+        return True
+    return cv2.absdiff(crop, last_crop).mean() >= threshold
+
+
+def recognize_batch(reader, crops, batch_size: int):
+    """
+    Recognize a list of same-size preprocessed crops without running the
+    text detector. The crops are stacked into one tall image and each one is
+    passed as its own horizontal box, so the recognizer sees them in order.
+    Returns one (clock, confidence) pair per crop.
+    """
+    h, w = crops[0].shape[:2]
+    canvas = np.vstack(crops)
+    boxes = [[0, w, i * h, (i + 1) * h] for i in range(len(crops))]
+
+    found = reader.recognize(canvas, horizontal_list=boxes, free_list=[],
+                             batch_size=batch_size,
+                             allowlist=CLOCK_ALLOWLIST)
+    if len(found) != len(crops):
+        found = []
+        for c in crops:
+            parts = reader.recognize(c, allowlist=CLOCK_ALLOWLIST)
+            found.append((None, " ".join(p[1] for p in parts),
+                          min((p[2] for p in parts), default=0.0)))
+    return [(normalize_clock(t), conf) for _, t, conf in found]
+
+
+def ocr_crops(reader, crops, batch_size: int):
+    """Return one (clock, confidence) pair per crop."""
+    if batch_size > 0:
+        return recognize_batch(reader, crops, batch_size)
+    return [read_clock(reader, c) for c in crops]
+
+
+class OcrCheckpoint:
+    """
+    Streams one chunk's readings to a part CSV and records the last frame
+    whose readings are safely on disk, so an interrupted run resumes there.
+    The checkpoint only applies to a run with the same `signature`.
+    """
+
+    def __init__(self, part_csv: str, signature: dict):
+        self.part_csv = part_csv
+        self.ckpt_path = part_csv + ".ckpt"
+        self.signature = signature
+        self.file = None
+        self.writer = None
+        self.rows = 0
+
+    def resume(self):
+        """Open the part file; return (last_frame, rows) or (None, [])."""
+        last_frame, rows = None, []
+        try:
+            with open(self.ckpt_path, "r", encoding="utf-8") as f:
+                ckpt = json.load(f)
+            if ckpt["signature"] == self.signature:
+                with open(self.part_csv, newline="", encoding="utf-8") as f:
+                    # Rows written after the checkpoint are dropped and
+                    # re-read from the video
+                    rows = [(float(t), c) for t, c in csv.reader(f)]
+                rows = rows[:ckpt["rows"]]
+                last_frame = ckpt["frame"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        self.file = open(self.part_csv, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.save(rows, last_frame)
+        return last_frame, rows
+
+    def save(self, rows, frame_id):
+        """Append rows, sync them to disk, then move the checkpoint."""
+        self.writer.writerows(rows)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.rows += len(rows)
+
+        tmp = self.ckpt_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature, "frame": frame_id,
+                       "rows": self.rows}, f)
+        os.replace(tmp, self.ckpt_path)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+    def remove(self):
+        self.close()
+        for path in (self.part_csv, self.ckpt_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def video_identity(video_path: str):
+    st = os.stat(video_path)
+    return f"{os.path.abspath(video_path)}|{st.st_size}|{int(st.st_mtime)}"
+
+
+def format_eta(seconds: float):
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+def ocr_frame_range(video_path: str, roi, start_frame: int, end_frame: int,
+                    frame_interval: int, sampling: str, label: str = "",
+                    batch_size: int = OCR_BATCH_SIZE,
+                    change_threshold: float = CHANGE_THRESHOLD,
+                    backend: str = OCR_BACKEND, part_csv: str = None):
+    """
+    OCR the sampled frames in (start_frame, end_frame] with a private
+    VideoCapture and EasyOCR reader. Returns (results, stats).
+    Samples whose ROI has not changed since the last OCR'd crop reuse
+    that crop's reading instead of being OCR'd again.
+    With part_csv, readings are streamed there with a resume checkpoint.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"❌ Cannot open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+
+    reader = easyocr.Reader(["en"], gpu=True)
+    bank = GlyphBank() if backend == "glyph" else None
+    stats = {"grabbed": 0, "retrieved": 0, "ocr_calls": 0, "reused": 0,
+             "glyph": 0}
+    results = []
+    total = max(1, (end_frame - start_frame) // frame_interval)
+    checkpoint = None
+    if part_csv:
+        checkpoint = OcrCheckpoint(part_csv, {
+            "video": video_identity(video_path), "roi": list(roi),
+            "start": start_frame, "end": end_frame,
+            "interval": frame_interval, "backend": backend,
+            "sampling": sampling, "change_threshold": change_threshold})
+        resumed_frame, rows = checkpoint.resume()
+        if resumed_frame is not None:
+            print(f"{label}Resuming after frame {resumed_frame} "
+                  f"({len(rows)} readings already on disk).")
+            results.extend(rows)
+            start_frame = resumed_frame
+    done_before = total - max(0, (end_frame - start_frame) // frame_interval)
+    saved = len(results)
+    run_start = last_save = last_report = time.perf_counter()
+    sampled = 0
+
+    # pending holds (frame_id, slot in pending_crops or None, known clock),
+    # kept in frame order until the queued crops are OCR'd
+    pending, pending_crops = [], []
+    last_crop, last_slot, last_clock = None, None, None
+
+    def emit(frame_id, clock_text):
         if clock_text:
             current_time = frame_id / fps
             results.append((current_time, clock_text))
-            if len(results) % 100 == 0:
-                print(f"Processed {len(results)} seconds...")
 
+    def flush():
+        nonlocal last_slot, last_clock
+        readings = ocr_crops(reader, pending_crops, batch_size) \
+            if pending_crops else []
+        stats["ocr_calls"] += len(pending_crops)
+        if bank is not None:
+            for crop, (clock_text, conf) in zip(pending_crops, readings):
+                if clock_text and conf >= LEARN_CONF:
+                    bank.learn(crop, clock_text)
+
+        for frame_id, slot, clock_text in pending:
+            emit(frame_id, readings[slot][0] if slot is not None
+                 else clock_text)
+        if last_slot is not None:
+            last_slot, last_clock = None, readings[last_slot][0]
+        pending.clear()
+        pending_crops.clear()
+
+    if sampling == "pipe":
+        frames = pipe_frames(video_path, roi, fps, start_frame, end_frame,
+                             frame_interval, stats)
+    else:
+        frames = sample_frames(cap, start_frame, end_frame, frame_interval,
+                               sampling, stats)
+
+    for frame_id, frame in frames:
+        crop = preprocess_gray(frame) if sampling == "pipe" \
+            else preprocess_roi(frame, roi)
+
+        if not roi_changed(crop, last_crop, change_threshold):
+            stats["reused"] += 1
+        else:
+            last_crop = crop
+            clock_text = None
+            if bank is not None:
+                clock_text = normalize_clock(bank.classify(crop) or "")
+            if clock_text:
+                stats["glyph"] += 1
+                last_slot, last_clock = None, clock_text
+            else:
+                pending_crops.append(crop)
+                last_slot, last_clock = len(pending_crops) - 1, None
+        pending.append((frame_id, last_slot, last_clock))
+
+        if not pending_crops or len(pending_crops) >= max(1, batch_size):
+            flush()
+
+        sampled += 1
+        now = time.perf_counter()
+        if checkpoint and not pending and now - last_save >= CHECKPOINT_SEC:
+            checkpoint.save(results[saved:], frame_id)
+            saved, last_save = len(results), now
+        if now - last_report >= PROGRESS_SEC:
+            rate = sampled / (now - run_start)
+            left = max(0, total - done_before - sampled)
+            print(f"{label}{done_before + sampled}/{total} samples, "
+                  f"{rate:.1f} frames/s, ETA {format_eta(left / rate)}")
+            last_report = now
+
+    if pending:
+        flush()
+
+    if checkpoint:
+        checkpoint.save(results[saved:], end_frame)
+        checkpoint.close()
+    cap.release()
+    return results, stats
+
+
+def _ocr_chunk(job):
+    """Process-pool entry point: job is the ocr_frame_range argument tuple."""
+    return ocr_frame_range(*job)
+
+
+def split_frames(start_frame: int, end_frame: int, frame_interval: int,
+                 n_chunks: int):
+    """
+    Split (start_frame, end_frame] into n_chunks contiguous ranges whose
+    boundaries sit on multiples of frame_interval, so every chunk samples
+    exactly the frames a single pass would.
+    """
+    samples = (end_frame - start_frame) // frame_interval
+    step = max(1, -(-samples // n_chunks)) * frame_interval
+    base = start_frame - start_frame % frame_interval
+    bounds = [start_frame] + list(range(base + step, end_frame, step)) \
+        + [end_frame]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def extract_clock_ocr(video_path: str,
+                      output_csv: str = "data/metadata/clock_map.csv",
+                      sample_rate: int = 1,
+                      sampling: str = SAMPLING_MODE,
+                      workers: int = WORKERS,
+                      batch_size: int = OCR_BATCH_SIZE,
+                      change_threshold: float = CHANGE_THRESHOLD,
+                      backend: str = OCR_BACKEND,
+                      roi=None, resume: bool = True):
+    """
+    Dense OCR of the clock, optionally over several worker processes.
+    Each chunk streams to output_csv.part<i> with a checkpoint, so a
+    crashed run picks up where it stopped (resume=False starts over).
+    """
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"❌ Cannot open video: {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = total_frames / fps
+    print(f"🎥 Loaded video ({duration/60:.1f} min, {fps:.1f} fps)")
+
+    roi = select_roi(cap, roi)
     cap.release()
 
+    frame_interval = max(1, int(fps * sample_rate))
+    start_frame = int(START_SEC * fps)
+    chunks = split_frames(start_frame, total_frames, frame_interval,
+                          max(1, workers))
+    parts = [f"{output_csv}.part{i}" for i in range(len(chunks))]
+    if not resume:
+        for part in parts:
+            OcrCheckpoint(part, {}).remove()
+    jobs = [(video_path, roi, a, b, frame_interval, sampling,
+             f"[chunk {i + 1}/{len(chunks)}] " if len(chunks) > 1 else "",
+             batch_size, change_threshold, backend, parts[i])
+            for i, (a, b) in enumerate(chunks)]
+
+    if len(jobs) > 1:
+        print(f"Running OCR on {len(jobs)} chunks in parallel...")
+        # spawn: torch/easyocr are not fork-safe once initialized
+        with mp.get_context("spawn").Pool(len(jobs)) as pool:
+            chunk_outputs = pool.map(_ocr_chunk, jobs)
+    else:
+        chunk_outputs = [_ocr_chunk(job) for job in jobs]
+
+    results = []
+    stats = {"grabbed": 0, "retrieved": 0, "ocr_calls": 0, "reused": 0,
+             "glyph": 0}
+    for chunk_results, chunk_stats in chunk_outputs:
+        results.extend(chunk_results)
+        for k in stats:
+            stats[k] += chunk_stats[k]
+
+    print(f"\nSampling ({sampling}): grabbed {stats['grabbed']} frames, "
+          f"retrieved {stats['retrieved']} for OCR.")
+    saved_pct = 100 * stats["reused"] / max(1, stats["retrieved"])
+    print(f"OCR calls: {stats['ocr_calls']} "
+          f"({stats['reused']} saved by unchanged ROI, {saved_pct:.1f}%).")
+    if backend == "glyph":
+        print(f"Glyph matches: {stats['glyph']} "
+              f"(EasyOCR fallbacks: {stats['ocr_calls']}).")
+
+    write_clock_csv(output_csv, results)
+    for part in parts:
+        OcrCheckpoint(part, {}).remove()
+    return results
+
+
+def write_clock_csv(output_csv: str, results):
     with open(output_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["video_time_sec", "clock_text"])
@@ -122,8 +571,148 @@ def extract_clock_ocr(video_path: str,
     print(f"\nSaved clock OCR map to {output_csv} ({len(results)} entries).")
 
 
+def probe_frame(cap, reader, roi, frame_id: int, batch_size: int):
+    """Seek to a single frame and return its normalized clock (or None)."""
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id - 1)
+    ret, frame = cap.read()
+    if not ret:
+        return None
+    return ocr_crops(reader, [preprocess_roi(frame, roi)], batch_size)[0][0]
+
+
+def format_clock(seconds: float):
+    """Inverse of clock_to_seconds: 'M:SS' above a minute, 'SS.f' below."""
+    if seconds >= 60:
+        m, s = divmod(int(round(seconds)), 60)
+        return f"{m}:{s:02d}"
+    return f"{max(seconds, 0.0):.1f}"
+
+
+def model_fill(f0: int, c0, f1: int, c1, frame_interval: int, fps: float):
+    """
+    Return the clock readings for the grid frames strictly between f0 and f1
+    if both ends fit the clock model (stopped, or running at 1 s/s),
+    otherwise None.
+    """
+    s0, s1 = clock_to_seconds(c0 or ""), clock_to_seconds(c1 or "")
+    if s0 is None or s1 is None:
+        return None
+
+    elapsed = (f1 - f0) / fps
+    if s0 == s1:
+        rate = 0.0
+    elif abs((s0 - s1) - elapsed) <= RUN_TOLERANCE:
+        rate = 1.0
+    else:
+        return None
+
+    return [(f, c0 if rate == 0 else format_clock(s0 - (f - f0) / fps))
+            for f in range(f0 + frame_interval, f1, frame_interval)]
+
+
+def extract_clock_adaptive(video_path: str,
+                           output_csv: str = "data/metadata/clock_map.csv",
+                           sample_rate: int = 1,
+                           coarse_sec: int = 10,
+                           batch_size: int = OCR_BATCH_SIZE,
+                           roi=None):
+    """
+    Sparse OCR: read every coarse_sec seconds, fill each gap analytically
+    when its endpoints match the clock model and bisect it with extra reads
+    otherwise (stoppages, period breaks, failed reads). Writes the same
+    sample_rate grid as extract_clock_ocr().
+    """
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"❌ Cannot open video: {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    print(f"🎥 Loaded video ({total_frames / fps / 60:.1f} min, "
+          f"{fps:.1f} fps)")
+
+    roi = select_roi(cap, roi)
+    reader = easyocr.Reader(["en"], gpu=True)
+
+    frame_interval = max(1, int(fps * sample_rate))
+    coarse_interval = frame_interval * max(1, int(coarse_sec / sample_rate))
+    start_frame = int(START_SEC * fps)
+    first = start_frame - start_frame % frame_interval + frame_interval
+
+    readings = {}
+    filled = {}
+
+    def read(frame_id):
+        if frame_id not in readings:
+            readings[frame_id] = probe_frame(cap, reader, roi, frame_id,
+                                             batch_size)
+            if len(readings) % 100 == 0:
+                print(f"Read {len(readings)} frames...")
+        return readings[frame_id]
+
+    coarse = list(range(first, total_frames + 1, coarse_interval))
+    if coarse and coarse[-1] != total_frames - total_frames % frame_interval:
+        coarse.append(total_frames - total_frames % frame_interval)
+
+    stack = [(a, b) for a, b in zip(coarse, coarse[1:])]
+    while stack:
+        f0, f1 = stack.pop()
+        if f1 - f0 <= frame_interval:
+            continue
+        fill = model_fill(f0, read(f0), f1, read(f1), frame_interval, fps)
+        if fill is not None:
+            filled.update(fill)
+            continue
+        mid = f0 + (f1 - f0) // 2
+        mid -= mid % frame_interval
+        if mid <= f0:
+            mid += frame_interval
+        stack += [(mid, f1), (f0, mid)]
+
+    cap.release()
+
+    rows = {f: c for f, c in readings.items() if c}
+    rows.update(filled)
+    results = [(f / fps, rows[f]) for f in sorted(rows)]
+
+    grid = len(range(first, total_frames + 1, frame_interval))
+    print(f"\nAdaptive sampling: {len(readings)} OCR reads for {grid} "
+          f"grid frames ({len(filled)} filled from the clock model).")
+    write_clock_csv(output_csv, results)
+    return results
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--video", required=True)
+    parser.add_argument("--roi", type=parse_roi, default=None,
+                        help="Clock region as x,y,w,h (skips selection)")
+    parser.add_argument("--sampling", choices=["grab", "seek", "pipe"],
+                        default=SAMPLING_MODE)
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="OCR worker processes (one video chunk each)")
+    parser.add_argument("--batch_size", type=int, default=OCR_BATCH_SIZE,
+                        help="Recognize ROI crops in batches, skipping text "
+                             "detection (0 = per-frame readtext)")
+    parser.add_argument("--change_threshold", type=float,
+                        default=CHANGE_THRESHOLD,
+                        help="Reuse the last reading when the ROI changed "
+                             "less than this (0 = OCR every sample)")
+    parser.add_argument("--ocr_backend", choices=["easyocr", "glyph"],
+                        default=OCR_BACKEND)
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore OCR checkpoints from an earlier run")
+    parser.add_argument("--coarse_sec", type=int, default=COARSE_SEC,
+                        help="Adaptive mode: read every N seconds and bisect "
+                             "only around stoppages (0 = dense sampling)")
     args = parser.parse_args()
-    extract_clock_ocr(args.video)
+    if args.coarse_sec > 0:
+        extract_clock_adaptive(args.video, coarse_sec=args.coarse_sec,
+                               batch_size=args.batch_size, roi=args.roi)
+    else:
+        extract_clock_ocr(args.video, sampling=args.sampling,
+                          workers=args.workers, batch_size=args.batch_size,
+                          change_threshold=args.change_threshold,
+                          backend=args.ocr_backend, roi=args.roi,
+                          resume=not args.fresh)
@@ -43,6 +43,28 @@ def fetch_game_data(game_id: str, save_dir: str = "data/metadata"):
     return data
 
 
+def roster_names(data: dict, team: str = None):
+    """
+    Names of the players who got on the floor, from the summary boxscore.
+    `team` (display name or abbreviation) limits it to one side.
+    """
+    names = []
+    for side in data.get("boxscore", {}).get("players", []):
+        info = side.get("team", {})
+        if team and team.lower() not in (
+                str(info.get("displayName", "")).lower(),
+                str(info.get("abbreviation", "")).lower()):
+            continue
+        for group in side.get("statistics", [])[:1]:
+            for entry in group.get("athletes", []):
+                if entry.get("didNotPlay"):
+                    continue
+                name = entry.get("athlete", {}).get("displayName")
+                if name:
+                    names.append(name)
+    return names
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--espn_id", required=True,
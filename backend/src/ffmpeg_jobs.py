@@ -0,0 +1,77 @@
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+# ======= CONFIG =======
+JOBS = min(8, os.cpu_count() or 4)
+RETRIES = 1
+STDERR_TAIL = 600
+# ======================
+
+
+class OptionalStep(list):
+    """
+    A command whose failure is reported (the result's "warnings") but does
+    not fail or retry its job, e.g. packaging a clip that was cut fine.
+    """
+
+
+def run_job(cmds, retries: int = RETRIES):
+    """
+    Run a job's commands in order, stopping at the first failure; a failed
+    job is retried from its first command up to `retries` more times.
+    Returns {"returncode", "stderr", "attempts", "warnings"} of the last
+    attempt; warnings holds the stderr of failed OptionalSteps.
+    """
+    result = None
+    for attempt in range(1, retries + 2):
+        returncode, stderr, warnings = 0, "", []
+        for cmd in cmds:
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.PIPE, text=True,
+                                    errors="replace")
+            if result.returncode != 0 and isinstance(cmd, OptionalStep):
+                warnings.append(result.stderr[-STDERR_TAIL:])
+                continue
+            returncode, stderr = result.returncode, result.stderr
+            if returncode != 0:
+                break
+        if returncode == 0:
+            break
+    return {"returncode": returncode, "stderr": stderr,
+            "attempts": attempt, "warnings": warnings}
+
+
+def run_jobs(jobs: dict, max_workers: int = JOBS, retries: int = RETRIES,
+             desc: str = "ffmpeg", on_done=None):
+    """
+    Run jobs (name -> list of ffmpeg commands) on a bounded thread pool.
+    ffmpeg does the work in its own process, so threads are enough to keep
+    max_workers cuts in flight. on_done(name, result) is called as each job
+    finishes. Returns name -> result and prints the stderr of failures.
+    """
+    results = {}
+    if not jobs:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(run_job, cmds, retries): name
+                   for name, cmds in jobs.items()}
+        for fut in tqdm(as_completed(futures), total=len(futures),
+                        desc=desc, ncols=80):
+            name = futures[fut]
+            results[name] = fut.result()
+            if on_done:
+                on_done(name, results[name])
+
+    for name, r in results.items():
+        for warning in r["warnings"]:
+            print(f"\n⚠️  {name}: optional step failed:\n{warning}")
+    failed = {n: r for n, r in results.items() if r["returncode"] != 0}
+    for name, r in failed.items():
+        print(f"\n❌ {name} failed (exit {r['returncode']}, "
+              f"{r['attempts']} attempts):\n{r['stderr'][-STDERR_TAIL:]}")
+    if failed:
+        print(f"{len(failed)}/{len(jobs)} {desc} jobs failed.")
+    return results
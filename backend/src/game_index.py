@@ -0,0 +1,224 @@
+import csv
+import gzip
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+# ======= CONFIG =======
+GAME_INDEX = "game_index.json"
+PLAYER_INDEX = "player_index.json"
+# Both indexes change after they are first published (logos and totals
+# arrive with upload_summary, games get re-processed, the player index
+# gains a card per game), so browsers revalidate them on every load; an
+# unchanged index costs a 304
+GAME_INDEX_CACHE = "no-cache"
+PLAYER_INDEX_CACHE = "no-cache"
+# ======================
+
+
+def game_teams(pbp: dict):
+    """Both sides of the game from the ESPN header (name, score, colors,
+    logo URL)."""
+    comp = (pbp.get("header", {}).get("competitions") or [{}])[0]
+    teams = []
+    for side in comp.get("competitors", []):
+        team = side.get("team", {}) or {}
+        logo = team.get("logo")
+        if not logo:
+            logo = ((team.get("logos") or [{}])[0] or {}).get("href")
+        teams.append({
+            "side": side.get("homeAway"),
+            "name": team.get("displayName"),
+            "abbreviation": team.get("abbreviation"),
+            "score": side.get("score"),
+            "color": team.get("color"),
+            "logo": logo,
+        })
+    return teams
+
+
+def game_score(pbp: dict):
+    """Final {away, home} score: header scores, else the last play's."""
+    score = {t["side"]: t["score"] for t in game_teams(pbp)
+             if t["side"] in ("away", "home") and t["score"] not in (None, "")}
+    if len(score) < 2:
+        last = (pbp.get("plays") or [{}])[-1]
+        score = {"away": last.get("awayScore"), "home": last.get("homeScore")}
+        if None in score.values():
+            return None
+    return {side: int(score[side]) for side in ("away", "home")}
+
+
+def player_totals(pbp: dict, player_name: str, player_id: str = None):
+    """The player's boxscore line (stat name -> value); {} if absent."""
+    for side in pbp.get("boxscore", {}).get("players", []):
+        for group in side.get("statistics", []) or []:
+            names = group.get("names", []) or []
+            for entry in group.get("athletes", []) or []:
+                athlete = entry.get("athlete", {}) or {}
+                if (player_id and athlete.get("id") == str(player_id)) or (
+                        not player_id
+                        and athlete.get("displayName") == player_name):
+                    return dict(zip(names, entry.get("stats", []) or []))
+    return {}
+
+
+def stint_list(subs_csv, player_name: str):
+    """The player's stints in cut order, from the (roster) subs CSV."""
+    if not os.path.exists(subs_csv):
+        return []
+    with open(subs_csv, newline="", encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f)
+                if r.get("player", player_name) == player_name]
+    return [{"n": i, "half": r["half"], "start": r["start_clock"],
+             "end": r["end_clock"]} for i, r in enumerate(rows, start=1)]
+
+
+def reel_durations(windows_json):
+    """Seconds of video in each reel, from the window plan."""
+    if not os.path.exists(windows_json):
+        return {}
+    with open(windows_json, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    lengths = [w["end"] - w["start"] for w in plan["windows"]]
+    return {category: round(sum(lengths[w] for w in ids), 1)
+            for category, ids in plan["reels"].items()}
+
+
+def streams(entry: dict):
+    """The MP4 URL of a manifest clip, plus its HLS playlist if packaged."""
+    out = {"url": entry["url"]}
+    if entry.get("hls"):
+        out["hls"] = entry["hls"]
+    return out
+
+
+def proxy_clips(time_index: dict):
+    """
+    Stints and reels as time ranges into the game proxy: stints get
+    "time": [start, end], reels the [start, end] of every clip in order.
+    """
+    stints = [{"n": st["n"], "half": st["half"], "start": st["start_clock"],
+               "end": st["end_clock"],
+               "time": [round(st["start"], 2), round(st["end"], 2)]}
+              for st in time_index["stints"]]
+    windows = [[round(w["start"], 2), round(w["end"], 2)]
+               for w in time_index["windows"]]
+    reels = {}
+    for category, ids in time_index["reels"].items():
+        clips = [windows[w] for w in ids]
+        reels[category] = {"clips": clips, "duration": round(
+            sum(end - start for start, end in clips), 1)}
+    return stints, reels
+
+
+def build_game_index(pbp: dict, manifest: dict, subs_csv, windows_json,
+                     summary: dict = None, player_id: str = None,
+                     time_index: dict = None):
+    """
+    Everything a game page needs in one small document: score, teams,
+    logos, the player's totals, stints with clock ranges and reels with
+    durations, all with their URLs (and HLS playlists) from the manifest.
+    With proxy storage (a time_index), stints and reels are time ranges
+    into the "proxy" video instead.
+    """
+    player_name = manifest["player"]
+    summary = summary or {}
+    comp = (pbp.get("header", {}).get("competitions") or [{}])[0]
+    teams = game_teams(pbp)
+
+    if time_index is not None:
+        stints, reels = proxy_clips(time_index)
+    else:
+        uploaded = {s["file"]: s for s in manifest.get("stints", [])}
+        stints = []
+        for stint in stint_list(subs_csv, player_name):
+            entry = uploaded.get(f"stint_{stint['n']}.mp4")
+            if entry:
+                stints.append({**stint, **streams(entry)})
+        durations = reel_durations(windows_json)
+        reels = {category: {**streams(reel),
+                            "duration": durations.get(category)}
+                 for category, reel in manifest.get("stats", {}).items()}
+
+    index = {
+        "player": player_name,
+        "game": manifest["game"],
+        "date": comp.get("date"),
+        "venue": comp.get("venue", {}).get("fullName"),
+        "score": game_score(pbp),
+        "teams": teams,
+        # upload_summary's re-hosted logos, else ESPN's (multi-player runs
+        # have no summary)
+        "logos": summary.get("logos") or {
+            t["side"]: t["logo"] for t in teams if t["logo"]},
+        "totals": summary.get("totals") or player_totals(
+            pbp, player_name, player_id),
+        "stints": stints,
+        "reels": reels,
+    }
+    if time_index is not None:
+        index["proxy"] = manifest["proxy"]["url"]
+    return index
+
+
+def merge_player_index(player_index: dict, game_index: dict, game_url: str):
+    """
+    Add (or replace) one game's card in the player's index of all games,
+    newest first. The card is what the player page shows, plus the URL of
+    the full game index.
+    """
+    card = {key: game_index[key] for key in
+            ("game", "date", "score", "logos", "totals")}
+    card["stints"] = len(game_index["stints"])
+    card["reels"] = sorted(game_index["reels"])
+    card["index"] = game_url
+
+    games = [g for g in (player_index or {}).get("games", [])
+             if g["game"] != card["game"]]
+    games.append(card)
+    games.sort(key=lambda g: g.get("date") or "", reverse=True)
+    return {"player": game_index["player"], "games": games}
+
+
+def write_gzip_json(data, path):
+    """
+    Write compact, gzip-compressed JSON. The gzip header carries no
+    timestamp, so unchanged content gives identical bytes and is skipped
+    on upload.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(gzip.compress(raw, mtime=0))
+    return path
+
+
+def upload_args(cache_control: str):
+    """ExtraArgs that let browsers (and CDNs) inflate and cache the JSON."""
+    return {"ContentType": "application/json", "ContentEncoding": "gzip",
+            "CacheControl": cache_control}
+
+
+def fetch_remote_index(sync, key: str):
+    """The uploaded index at `key`, or None if there is none yet."""
+    try:
+        body = sync.client.get_object(Bucket=sync.bucket, Key=key)["Body"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    raw = body.read()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+
+def list_game_indexes(sync, player_key: str):
+    """Bucket keys of every game index uploaded under the player."""
+    pages = sync.client.get_paginator("list_objects_v2").paginate(
+        Bucket=sync.bucket, Prefix=f"{player_key}/")
+    return sorted(obj["Key"] for page in pages
+                  for obj in page.get("Contents", [])
+                  if obj["Key"].endswith(f"/metadata/{GAME_INDEX}"))
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+
+from artifact_cache import make_key, video_digest
+from ffmpeg_jobs import run_job
+
+# ======= CONFIG =======
+FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+PROXY_DIR = "data/proxies"
+TIME_INDEX = "time_index.json"
+# Web proxy: small H.264/AAC, keyframe every KEYFRAME_SEC so any clip
+# start is a short seek, moov first so playback starts immediately
+PROXY_HEIGHT = 720
+PROXY_ENCODE = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+                "-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "96k"]
+KEYFRAME_SEC = 2
+# ======================
+
+
+def proxy_path(game_name: str):
+    return os.path.join(PROXY_DIR, f"{game_name}.mp4")
+
+
+def proxy_key(video_path: str):
+    """What the proxy depends on: the source content and the settings."""
+    return make_key("proxy", video=video_digest(video_path),
+                    height=PROXY_HEIGHT, encode=PROXY_ENCODE,
+                    keyframes=KEYFRAME_SEC)
+
+
+def proxy_command(ffmpeg_path: str, video_path: str, out_path: str):
+    """
+    Re-encode the whole game once. The timeline is kept as is, so clock
+    map times are proxy times and clips need no cutting.
+    """
+    return [ffmpeg_path, "-y", "-i", video_path,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", f"scale=-2:'min({PROXY_HEIGHT},ih)'",
+            *PROXY_ENCODE,
+            "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_SEC})",
+            "-movflags", "+faststart", out_path]
+
+
+def make_proxy(video_path: str, out_path: str, ffmpeg_path: str = None):
+    """
+    Encode the game proxy unless an up-to-date one exists (its sidecar
+    .json records the proxy_key it was made with). Returns out_path.
+    The encode goes to a per-process temp file that replaces out_path only
+    when complete, so batch jobs of the same game (other players) and
+    crashes never leave a half-written proxy behind.
+    """
+    ffmpeg_path = ffmpeg_path or FFMPEG_PATH
+    key = proxy_key(video_path)
+    sidecar = f"{out_path}.json"
+    if os.path.exists(out_path) and os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            if json.load(f).get("key") == key:
+                print(f"Skipping proxy ({out_path} is up to date)")
+                return out_path
+
+    folder, name = os.path.split(out_path)
+    os.makedirs(folder or ".", exist_ok=True)
+    tmp = os.path.join(folder, f".{os.getpid()}.{name}")
+    print(f"Encoding web proxy of {video_path}...")
+    result = run_job([proxy_command(ffmpeg_path, video_path, tmp)],
+                     retries=0)
+    if result["returncode"] != 0:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise RuntimeError(f"❌ Proxy encode failed:\n{result['stderr']}")
+    os.replace(tmp, out_path)
+    with open(f"{tmp}.json", "w", encoding="utf-8") as f:
+        json.dump({"key": key, "video": video_path}, f)
+    os.replace(f"{tmp}.json", sidecar)
+    print(f"Saved proxy: {out_path} "
+          f"({os.path.getsize(out_path) / 1024 ** 2:.0f} MB)")
+    return out_path
+
+
+def write_time_index(player_name: str, game_name: str, stints,
+                     windows_json: str, out_path: str):
+    """
+    Save a player's time index into the proxy: every stint and highlight
+    window as start/end seconds, the window ids of each category reel and
+    the play-by-play events with their window (windows.json layout).
+    """
+    plan = {"windows": [], "reels": {}, "events": []}
+    if os.path.exists(windows_json):
+        with open(windows_json, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+
+    index = {
+        "player": player_name,
+        "game": game_name,
+        "stints": stints,
+        **plan,
+    }
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    print(f"Saved time index: {len(stints)} stints, "
+          f"{len(plan['windows'])} windows -> {out_path}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Encode the single-file web proxy of a game")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--game", required=True)
+    args = parser.parse_args()
+
+    make_proxy(args.video, proxy_path(args.game))
@@ -1,12 +1,16 @@
 import os
-import re
 import json
 import pandas as pd
-import subprocess
-from tqdm import tqdm
 import argparse
 import shutil
 from tempfile import mkdtemp
+from clock_index import ClockIndex, HALF_LABELS
+from ffmpeg_jobs import run_jobs, JOBS
+from hls_package import with_hls
+from keyframes import (FASTSTART, load_keyframes, plan_cut, cut_commands,
+                       probe_source)
+from pbp_events import build_event_table, load_plays, player_stat_events
+from pbp_events import categorize_play  # noqa: F401  (re-exported)
 
 # ===== CONFIG =====
 VIDEO_PATH = None
@@ -15,207 +19,302 @@ PLAYER_NAME = None
 GAME_NAME = None
 CLOCK_MAP = "data/metadata/clock_map_clean.csv"
 FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+FFPROBE_PATH = r"C:\ffmpeg\bin\ffprobe.exe"
 PRE_SEC = 7.5
 POST_SEC = 2.5
 KEEP_SEGMENTS = False
+MAX_JOBS = JOBS
+# Build each reel with one ffmpeg call reading inpoint/outpoint windows
+# from the source video instead of cutting per-segment temp files
+SINGLE_PASS = False
+# Windows closer than this (seconds) are merged into one clip
+MERGE_GAP = 1.0
+# Merge windows across categories too, so reels share identical footage
+MERGE_ACROSS_CATEGORIES = False
+# Keyframe-aware segment cuts (copy when a keyframe is close to the window
+# start, else re-encode only up to the next keyframe)
+SMART_CUT = False
+# Also remux every reel into HLS (fMP4 segments) right after it is joined
+HLS = False
 # ==================
 
 
-def clock_to_seconds(clock_str):
-    if not isinstance(clock_str, str):
-        clock_str = str(clock_str)
-    if ":" in clock_str:
-        m, s = map(float, clock_str.split(":"))
-        return m * 60 + s
-    return float(clock_str)
+def player_events(table, clock_index, player_name):
+    """One player's categorized plays with their video windows, or None."""
+    rows = player_stat_events(table, player_name)
+    times, deltas = clock_index.align(
+        list(rows["clock"]), [HALF_LABELS.get(p) for p in rows["period"]])
+
+    df = pd.DataFrame({
+        "category": rows["category"].to_numpy(),
+        "period": rows["period"].to_numpy(),
+        "clock": rows["clock"].to_numpy(),
+        "video_time": times,
+        "delta": deltas,
+        "text": rows["text"].to_numpy(),
+    }).dropna(subset=["video_time"]).reset_index(drop=True)
+    if df.empty:
+        return None
+
+    real_video_time = df["video_time"] + df["delta"]
+    df["start"] = (real_video_time - PRE_SEC).clip(lower=0)
+    df["end"] = real_video_time + POST_SEC
+    return df
+
+
+def plan_reels(table, clock_index, player_name, output_dir):
+    """
+    Plan one player's reels and save their windows.json (removing any
+    earlier one if the player has no events, so it is never reused).
+    Returns {reel_path: [(start, end), ...]}.
+    """
+    windows_json = os.path.join(output_dir, "windows.json")
+    df = player_events(table, clock_index, player_name)
+    if df is None:
+        print(f"No events found for {player_name}.")
+        if os.path.exists(windows_json):
+            os.remove(windows_json)
+        return {}
+    print(f"Found {len(df)} highlight events for {player_name}")
 
-
-def find_video_time(clock_df, clock_text, tolerance=5.0):
-    """Return closest OCR video_time AND signed delta."""
-    val_event = clock_to_seconds(clock_text)
-    clock_df = clock_df.copy()
-    clock_df["clock_val"] = clock_df["clock_text"].apply(clock_to_seconds)
-
-    clock_df["signed_diff"] = clock_df["clock_val"] - val_event
-    clock_df["abs_diff"] = clock_df["signed_diff"].abs()
-
-    nearest = clock_df.nsmallest(1, "abs_diff")
-
-    if nearest.empty:
-        return None, None
-
-    delta = float(nearest["signed_diff"].iloc[0])
-    video_time = float(nearest["video_time_sec"].iloc[0])
-    return video_time, delta
-
-
-def find_video_time_by_period(clock_df, clock_text, period, tolerance=5.0):
-    half_map = {1: "1st Half", 2: "2nd Half", 3: "Overtime 1", 4: "Overtime 2"}
-    half_label = half_map.get(period, None)
-    sub_df = clock_df[clock_df["half"] ==
-                      half_label] if "half" in clock_df else clock_df
-    return find_video_time(sub_df, clock_text, tolerance)
-
-
-def categorize_play(play, player_name):
-    text = play.get("text", "").lower()
-    if not text or player_name.lower() not in text:
-        return []
-
-    cats = []
-    p = player_name.lower()
-
-    # Skip free throws
-    if "free throw" in text:
-        return []
-
-    # Assists
-    if f"assisted by {p}" in text:
-        cats.append("assists")
-
-    # Made/Missed shots
-    if f"{p} made" in text or f"{p} missed" in text:
-        made = "made" in text
-        if "three point" in text:
-            cats += ["3pt_made" if made else "3pt_missed", "3pt_all"]
-        elif any(k in text for k in ["jumper", "layup", "dunk", "tip"]):
-            cats += ["2pt_made" if made else "2pt_missed", "2pt_all"]
-
-        cats += ["made_shots" if made else "missed_shots", "all_shots"]
-
-    # Rebounds
-    if "defensive rebound" in text:
-        cats += ["def_rebound", "rebounds"]
-    elif "offensive rebound" in text:
-        cats += ["off_rebound", "rebounds"]
-
-    # Blocks
-    if "block" in text:
-        cats.append("blocks")
-
-    # Steals
-    if f"{p} steal" in text:
-        cats.append("steals")
-
-    # Turnovers
-    if "turnover" in text or "lost the ball" in text:
-        cats.append("turnovers")
-
-    # Fouls
-    if f"foul on {p}" in text or f"{p} foul" in text:
-        cats.append("fouls")
-
-    return sorted(set(cats))
-
-
-def main(output_dir):
     os.makedirs(output_dir, exist_ok=True)
+    windows, reels = plan_windows(df)
+    write_window_index(df, windows, reels, windows_json)
+    return {os.path.join(output_dir, f"{category}.mp4"):
+            [windows[w] for w in ids] for category, ids in reels.items()}
 
-    with open(ESPN_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    plays = data.get("plays", []) or data.get("pbp", [])
-    clock_df = pd.read_csv(CLOCK_MAP)
-
-    events = []
-
-    for play in plays:
-        text = play.get("text", "")
-        period = (play.get("period", {}) or {}).get("number")
-        clock = (play.get("clock", {}) or {}).get(
-            "displayValue") or play.get("clock")
-        cats = categorize_play(play, PLAYER_NAME)
-
-        if not cats:
-            continue
-
-        video_time, delta = find_video_time_by_period(clock_df, clock, period)
-        if video_time is None:
-            continue
-
-        for c in cats:
-            events.append({
-                "category": c,
-                "period": period,
-                "clock": clock,
-                "video_time": video_time,
-                "delta": delta,
-                "text": text
-            })
-
-    if not events:
-        print("No events found.")
-        return
-
-    df = pd.DataFrame(events)
-    print(f"Found {len(df)} highlight events for {PLAYER_NAME}")
 
+def build_reels(reels, on_done=None):
+    """
+    Cut and join reels (reel_path -> windows) as one pooled batch.
+    on_done(reel_path, result) is called as each reel is finished.
+    """
     temp_root = mkdtemp(prefix="hl_")
 
     try:
-        for category, group in df.groupby("category"):
-            group = group.sort_values("video_time").reset_index(drop=True)
-            temp_cat_dir = os.path.join(temp_root, category)
-            os.makedirs(temp_cat_dir, exist_ok=True)
-
-            print(f"\nCutting {len(group)} clips for {category}...")
-            segment_paths = []
-
-            for i, row in tqdm(group.iterrows(), total=len(group)):
-
-                real_video_time = row.video_time + row.delta
-
-                start = max(0, real_video_time - PRE_SEC)
-                end = real_video_time + POST_SEC
-
-                seg_name = f"{category}_{i:04d}.mp4"
-                seg_path = os.path.join(temp_cat_dir, seg_name)
-                segment_paths.append(seg_path)
-
-                cmd = [
-                    FFMPEG_PATH, "-y",
-                    "-ss", f"{start:.2f}", "-to", f"{end:.2f}",
-                    "-i", VIDEO_PATH,
-                    "-c", "copy",
-                    seg_path
-                ]
-
-                subprocess.run(cmd, stdout=subprocess.DEVNULL,
-                               stderr=subprocess.DEVNULL)
-
-            concat_txt = os.path.join(temp_cat_dir, "segments.txt")
-            with open(concat_txt, "w") as f:
-                for p in segment_paths:
-                    f.write(f"file '{os.path.abspath(p)}'\n")
-
-            final_out = os.path.join(output_dir, f"{category}.mp4")
-            subprocess.run(
-                [FFMPEG_PATH, "-f", "concat", "-safe", "0",
-                    "-i", concat_txt, "-c", "copy", final_out],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-
-            print(f"Saved: {final_out}")
-
-            if not KEEP_SEGMENTS:
-                shutil.rmtree(temp_cat_dir, ignore_errors=True)
+        if SINGLE_PASS:
+            jobs = single_pass_reel_jobs(reels, temp_root)
+        else:
+            jobs = segment_reel_jobs(reels, temp_root)
+        if HLS:
+            jobs = with_hls(jobs, FFMPEG_PATH)
+
+        joined = run_jobs(jobs, max_workers=MAX_JOBS, desc="Joining reels",
+                          on_done=on_done)
+        for final_out, r in joined.items():
+            if r["returncode"] == 0:
+                print(f"Saved: {final_out}")
 
     finally:
         if not KEEP_SEGMENTS:
             shutil.rmtree(temp_root, ignore_errors=True)
 
 
+def cut_players(players: dict, clock_index, table, on_done=None):
+    """
+    Build the reels of several players (name -> output dir) in one batch
+    from the pbp event table. Windows shared between teammates (an assist
+    and the made shot) are cut only once.
+    """
+    reels = {}
+    for player_name, output_dir in players.items():
+        reels.update(plan_reels(table, clock_index, player_name, output_dir))
+    if reels:
+        build_reels(reels, on_done)
+
+
+def main(output_dir, clock_index=None, data=None):
+    """Cut the player's highlight reels; in-memory inputs skip file reads."""
+    if data is None:
+        with open(ESPN_JSON, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if clock_index is None:
+        clock_index = ClockIndex.from_csv(CLOCK_MAP)
+
+    table = build_event_table(load_plays(data), [PLAYER_NAME])
+    cut_players({PLAYER_NAME: output_dir}, clock_index, table)
+
+
+def merge_windows(group):
+    """
+    Coalesce the windows of a group of events (sorted by start) when they
+    overlap or are at most MERGE_GAP seconds apart.
+    Returns [(event_indices, (start, end))].
+    """
+    merged = []
+    for idx, row in group.sort_values("start").iterrows():
+        if merged and row.start <= merged[-1][1][1] + MERGE_GAP:
+            indices, (start, end) = merged[-1]
+            merged[-1] = (indices + [idx], (start, max(end, row.end)))
+        else:
+            merged.append(([idx], (row.start, row.end)))
+    return merged
+
+
+def plan_windows(df):
+    """
+    Merge event windows per category (or across all categories with
+    MERGE_ACROSS_CATEGORIES). Sets df["window"] to each event's window id
+    and returns (windows, reels): windows[id] is a (start, end) pair and
+    reels[category] the ids of its windows in video order.
+    """
+    groups = [(None, df)] if MERGE_ACROSS_CATEGORIES \
+        else df.groupby("category")
+
+    window_ids = {}
+    df["window"] = -1
+    for _, group in groups:
+        for indices, (start, end) in merge_windows(group):
+            window = (f"{start:.2f}", f"{end:.2f}")
+            window_ids.setdefault(window, len(window_ids))
+            df.loc[indices, "window"] = window_ids[window]
+
+    windows = list(window_ids)
+    reels = {
+        category: sorted(set(group["window"]),
+                         key=lambda w: float(windows[w][0]))
+        for category, group in df.groupby("category")
+    }
+
+    clips = sum(len(ids) for ids in reels.values())
+    print(f"Planned {clips} clips from {len(df)} events "
+          f"({len(windows)} unique windows).")
+    return windows, reels
+
+
+def write_window_index(df, windows, reels, path):
+    """
+    Save the window plan for the frontend: every window's source times,
+    the window ids making up each {category}.mp4 in order, and the window
+    each play-by-play event falls in.
+    """
+    index = {
+        "windows": [{"id": i, "start": float(start), "end": float(end)}
+                    for i, (start, end) in enumerate(windows)],
+        "reels": {category: [int(w) for w in ids]
+                  for category, ids in reels.items()},
+        "events": [
+            {"category": row.category, "period": row.period,
+             "clock": row.clock, "text": row.text, "window": int(row.window)}
+            for row in df.itertuples()
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+
+def concat_file_line(path):
+    """'file' directive for the concat demuxer, quoting the path."""
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+
+def segment_reel_jobs(reels, temp_root):
+    """
+    Cut every unique window into a shared segment, then return the concat
+    jobs that join each reel's segments into its reel_path.
+    """
+    # Event-segment store: one play lands in several categories
+    # (e.g. made_shots, all_shots, 2pt_made, 2pt_all), so every unique
+    # window is cut once and shared by all the reels that include it.
+    segment_dir = os.path.join(temp_root, "segments")
+    os.makedirs(segment_dir, exist_ok=True)
+    keyframes = load_keyframes(VIDEO_PATH, FFPROBE_PATH) if SMART_CUT else []
+    source = probe_source(VIDEO_PATH, FFPROBE_PATH) if SMART_CUT else None
+    segment_store = {}
+    segment_jobs = {}
+    reel_segments = {}
+    for final_out, windows in reels.items():
+        reel_segments[final_out] = []
+        for window in windows:
+            if window not in segment_store:
+                seg_name = f"segment_{len(segment_store):04d}.mp4"
+                seg_path = os.path.join(segment_dir, seg_name)
+                segment_store[window] = seg_path
+                plan = plan_cut(keyframes, float(window[0]), float(window[1]))
+                segment_jobs[seg_path] = cut_commands(
+                    FFMPEG_PATH, VIDEO_PATH, plan, seg_path,
+                    os.path.join(temp_root, "parts"), source)
+            reel_segments[final_out].append(segment_store[window])
+
+    total_refs = sum(len(v) for v in reel_segments.values())
+    print(f"\nCutting {len(segment_jobs)} unique clips for "
+          f"{total_refs} clips in {len(reel_segments)} reels...")
+    cut = run_jobs(segment_jobs, max_workers=MAX_JOBS, desc="Cutting clips")
+
+    concat_jobs = {}
+    for n, (final_out, segment_paths) in enumerate(reel_segments.items()):
+        segment_paths = [p for p in segment_paths
+                         if cut[p]["returncode"] == 0]
+        if not segment_paths:
+            print(f"No clips cut for {final_out}, skipping.")
+            continue
+
+        concat_txt = os.path.join(temp_root, f"reel_{n:04d}_segments.txt")
+        with open(concat_txt, "w") as f:
+            for p in segment_paths:
+                f.write(concat_file_line(p))
+
+        concat_jobs[final_out] = [
+            [FFMPEG_PATH, "-y", "-f", "concat", "-safe", "0",
+             "-i", concat_txt, "-c", "copy", *FASTSTART, final_out]]
+    return concat_jobs
+
+
+def single_pass_reel_jobs(reels, temp_root):
+    """
+    Return one job per reel that reads its windows straight from the
+    source video through inpoint/outpoint concat directives, so no
+    per-segment files are written.
+    """
+    print(f"\nBuilding {len(reels)} reels in a single pass...")
+    concat_jobs = {}
+    for n, (final_out, windows) in enumerate(reels.items()):
+        concat_txt = os.path.join(temp_root, f"reel_{n:04d}_windows.txt")
+        with open(concat_txt, "w") as f:
+            f.write("ffconcat version 1.0\n")
+            for start, end in windows:
+                f.write(concat_file_line(VIDEO_PATH))
+                f.write(f"inpoint {start}\noutpoint {end}\n")
+
+        concat_jobs[final_out] = [
+            [FFMPEG_PATH, "-y", "-f", "concat", "-safe", "0",
+             "-i", concat_txt, "-c", "copy", *FASTSTART, final_out]]
+    return concat_jobs
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--player", required=True)
     parser.add_argument("--game", required=True)
     parser.add_argument("--espn_id", required=True)
     parser.add_argument("--video", required=True)
+    parser.add_argument("--jobs", type=int, default=JOBS,
+                        help="Concurrent ffmpeg processes")
+    parser.add_argument("--merge_gap", type=float, default=MERGE_GAP,
+                        help="Merge windows at most this many seconds apart")
+    parser.add_argument("--merge_across", action="store_true",
+                        default=MERGE_ACROSS_CATEGORIES,
+                        help="Merge overlapping windows across categories")
+    parser.add_argument("--single_pass", action="store_true",
+                        default=SINGLE_PASS,
+                        help="Build reels without intermediate segments")
+    parser.add_argument("--hls", action="store_true", default=HLS,
+                        help="Package clips as HLS for fast-start streaming")
+    parser.add_argument("--smart_cut", action="store_true", default=SMART_CUT,
+                        help="Keyframe-aware segment cuts")
     args = parser.parse_args()
 
     PLAYER_NAME = args.player
     GAME_NAME = args.game
     ESPN_JSON = "data/metadata/pbp.json"
     VIDEO_PATH = args.video
+    MAX_JOBS = args.jobs
+    SINGLE_PASS = args.single_pass
+    SMART_CUT = args.smart_cut
+    HLS = args.hls
+    MERGE_GAP = args.merge_gap
+    MERGE_ACROSS_CATEGORIES = args.merge_across
 
     OUTPUT_DIR = os.path.join(
         "data", "processed",
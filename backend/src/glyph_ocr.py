@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+# ======= CONFIG =======
+GLYPH_W, GLYPH_H = 12, 20   # size every digit cell is normalized to
+LEARN_CONF = 0.9            # min EasyOCR confidence to learn glyphs from
+MIN_SAMPLES = 3             # samples every digit needs before matching
+MIN_SCORE = 0.85            # min correlation to accept a digit match
+MIN_MARGIN = 0.05           # min gap between best and second-best digit
+SEPARATOR_HEIGHT_RATIO = 0.4  # runs whose blobs are all shorter are : or .
+# ======================
+
+
+def foreground(binary):
+    """Return the crop with glyph pixels set (digits are the minority)."""
+    fg = binary > 0
+    return ~fg if fg.mean() > 0.5 else fg
+
+
+def segment_clock(binary):
+    """
+    Split a binarized clock crop into column runs separated by empty columns.
+    Returns (layout, cells): layout is a string like "##:##" or "##.#" where
+    "#" marks a digit cell, and cells are the digit crops left to right.
+    Returns (None, []) when a run cannot be classified.
+    """
+    fg = foreground(binary)
+    cols = fg.any(axis=0)
+    if not cols.any():
+        return None, []
+
+    runs = []
+    start = None
+    for i, on in enumerate(np.append(cols, False)):
+        if on and start is None:
+            start = i
+        elif not on and start is not None:
+            runs.append((start, i))
+            start = None
+
+    boxes = []
+    for a, b in runs:
+        rows = np.flatnonzero(fg[:, a:b].any(axis=1))
+        boxes.append((a, b, rows[0], rows[-1] + 1))
+    max_h = max(y1 - y0 for _, _, y0, y1 in boxes)
+
+    layout, cells = "", []
+    for a, b, y0, y1 in boxes:
+        n, _, blob_stats, _ = cv2.connectedComponentsWithStats(
+            fg[:, a:b].astype(np.uint8))
+        heights = blob_stats[1:, cv2.CC_STAT_HEIGHT]
+        tops = blob_stats[1:, cv2.CC_STAT_TOP]
+        if (heights >= SEPARATOR_HEIGHT_RATIO * max_h).any():
+            layout += "#"
+            cells.append(fg[y0:y1, a:b])
+        elif n - 1 == 2:
+            layout += ":"
+        elif n - 1 == 1 and tops[0] > fg.shape[0] / 2:
+            layout += "."
+        else:
+            return None, []
+    return layout, cells
+
+
+def glyph_vector(cell):
+    """Resize a digit cell to GLYPH_H keeping aspect, center it on a
+    GLYPH_W canvas and return it as a zero-mean unit vector."""
+    h, w = cell.shape
+    new_w = max(1, min(GLYPH_W, round(w * GLYPH_H / h)))
+    img = cv2.resize(cell.astype(np.float32), (new_w, GLYPH_H),
+                     interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((GLYPH_H, GLYPH_W), np.float32)
+    off = (GLYPH_W - new_w) // 2
+    canvas[:, off:off + new_w] = img
+
+    v = canvas.ravel() - canvas.mean()
+    norm = np.linalg.norm(v)
+    return v / norm if norm > 0 else v
+
+
+class GlyphBank:
+    """
+    Per-broadcast digit templates learned from confident EasyOCR readings.
+    classify() returns a clock string only when every digit cell matches a
+    template confidently; otherwise the caller falls back to EasyOCR.
+    Nothing is matched until all ten digits are learned: an unseen digit
+    would otherwise match a similar learned one (8 -> 0) unchallenged.
+    """
+
+    def __init__(self):
+        self.sums = np.zeros((10, GLYPH_W * GLYPH_H), np.float32)
+        self.counts = np.zeros(10, int)
+        self.templates = None
+        self.digits = None
+
+    def learn(self, binary, clock_text: str):
+        """Add the digit cells of a crop whose reading is known."""
+        layout, cells = segment_clock(binary)
+        expected = "".join("#" if c.isdigit() else c for c in clock_text)
+        if layout != expected:
+            return False
+
+        digits = [int(c) for c in clock_text if c.isdigit()]
+        for d, cell in zip(digits, cells):
+            self.sums[d] += glyph_vector(cell)
+            self.counts[d] += 1
+
+        ready = np.flatnonzero(self.counts >= MIN_SAMPLES)
+        if len(ready) == 10:
+            t = self.sums[ready]
+            self.templates = t / np.linalg.norm(t, axis=1, keepdims=True)
+            self.digits = ready
+        return True
+
+    def classify(self, binary):
+        """Return the clock text of a crop, or None if not confident."""
+        if self.templates is None:
+            return None
+        layout, cells = segment_clock(binary)
+        if not cells:
+            return None
+
+        vecs = np.stack([glyph_vector(c) for c in cells])
+        scores = vecs @ self.templates.T
+        order = np.argsort(scores, axis=1)
+        best = scores[np.arange(len(cells)), order[:, -1]]
+        second = scores[np.arange(len(cells)), order[:, -2]]
+        if (best < MIN_SCORE).any() or (best - second < MIN_MARGIN).any():
+            return None
+
+        digits = iter(self.digits[order[:, -1]])
+        return "".join(str(next(digits)) if c == "#" else c for c in layout)
@@ -0,0 +1,98 @@
+import argparse
+import os
+import shutil
+
+from ffmpeg_jobs import OptionalStep, run_jobs, JOBS
+
+# ======= CONFIG =======
+FFMPEG_PATH = r"C:\ffmpeg\bin\ffmpeg.exe"
+MAX_JOBS = JOBS
+# Packages of <dir>/<clip>.mp4 go to <dir>/HLS_DIR/<clip>/
+HLS_DIR = "hls"
+PLAYLIST = "index.m3u8"
+INIT_SEGMENT = "init.mp4"
+# Target segment length; -c copy can only split on keyframes
+SEGMENT_SEC = 4
+# ======================
+
+
+def hls_dir(clip_path: str):
+    folder, name = os.path.split(clip_path)
+    return os.path.join(folder, HLS_DIR, os.path.splitext(name)[0])
+
+
+def hls_command(ffmpeg_path: str, clip_path: str):
+    """
+    Remux a finished clip into a VOD HLS playlist of fMP4 segments
+    (stream copy, nothing is re-encoded). The segment dir must exist.
+    """
+    out_dir = hls_dir(clip_path)
+    return [ffmpeg_path, "-y", "-i", clip_path, "-map", "0", "-c", "copy",
+            "-f", "hls", "-hls_time", str(SEGMENT_SEC),
+            "-hls_playlist_type", "vod", "-hls_segment_type", "fmp4",
+            "-hls_fmp4_init_filename", INIT_SEGMENT,
+            "-hls_segment_filename", os.path.join(out_dir, "seg_%04d.m4s"),
+            os.path.join(out_dir, PLAYLIST)]
+
+
+def with_hls(jobs: dict, ffmpeg_path: str = None):
+    """
+    Append the HLS remux to every job (clip path -> commands), so each
+    clip is packaged as soon as it is cut, on the same worker. The remux
+    is an OptionalStep: if it fails the clip still counts (and uploads),
+    just without a package. Old packages are cleared first so no stale
+    segment is uploaded.
+    """
+    ffmpeg_path = ffmpeg_path or FFMPEG_PATH
+    packaged = {}
+    for clip_path, cmds in jobs.items():
+        out_dir = hls_dir(clip_path)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir, exist_ok=True)
+        packaged[clip_path] = cmds + [
+            OptionalStep(hls_command(ffmpeg_path, clip_path))]
+    return packaged
+
+
+def hls_files(clip_path: str):
+    """
+    Files of the clip's HLS package (playlist last), or [] if it has none,
+    the remux did not finish (no #EXT-X-ENDLIST) or the clip was cut again
+    after it was packaged.
+    """
+    out_dir = hls_dir(clip_path)
+    playlist = os.path.join(out_dir, PLAYLIST)
+    if not os.path.exists(playlist) or not os.path.exists(clip_path) or \
+            os.path.getmtime(playlist) < os.path.getmtime(clip_path):
+        return []
+    with open(playlist, "r", encoding="utf-8", errors="replace") as f:
+        if "#EXT-X-ENDLIST" not in f.read():
+            return []
+    files = sorted(os.path.join(out_dir, f) for f in os.listdir(out_dir)
+                   if f != PLAYLIST)
+    return files + [playlist]
+
+
+def package_clips(clip_paths, on_done=None):
+    """Package already cut clips (e.g. from an earlier run) as one batch."""
+    jobs = with_hls({path: [] for path in clip_paths})
+    results = run_jobs(jobs, max_workers=MAX_JOBS, desc="Packaging HLS",
+                       on_done=on_done)
+    ok = sum(1 for r in results.values() if r["returncode"] == 0)
+    print(f"\nDone! {ok}/{len(jobs)} clips packaged.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Package a game's stints and reels as HLS (fMP4)")
+    parser.add_argument("--dir", required=True,
+                        help="data/processed/<Player>/<game>")
+    args = parser.parse_args()
+
+    clips = [os.path.join(args.dir, sub, f)
+             for sub in ("intervals", "stats")
+             if os.path.isdir(os.path.join(args.dir, sub))
+             for f in sorted(os.listdir(os.path.join(args.dir, sub)))
+             if f.endswith(".mp4")]
+    package_clips(clips)
@@ -0,0 +1,171 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# ======= CONFIG =======
+QUEUE_DB = "data/jobs.sqlite"
+# A running job whose heartbeat is older than this is considered abandoned
+# (crashed worker) and can be claimed again
+STALE_SEC = 10 * 60
+HEARTBEAT_SEC = 30
+MAX_ATTEMPTS = 3
+# ======================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_info TEXT NOT NULL,
+    status    TEXT NOT NULL DEFAULT 'queued',
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    worker    TEXT,
+    created   REAL NOT NULL,
+    started   REAL,
+    heartbeat REAL,
+    finished  REAL,
+    timings   TEXT,
+    error     TEXT
+)
+"""
+
+
+def connect(db_path: str = QUEUE_DB):
+    """
+    Open the queue database. Writers take SQLite's lock, so workers in
+    other processes (or machines, if the shared filesystem supports file
+    locking) never claim the same job.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(SCHEMA)
+    return conn
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def add_job(info: dict, db_path: str = QUEUE_DB):
+    """Queue one game (game_info.json fields). Returns the job id."""
+    with closing(connect(db_path)) as conn:
+        cur = conn.execute(
+            "INSERT INTO jobs (game_info, created) VALUES (?, ?)",
+            (json.dumps(info), time.time()))
+        return cur.lastrowid
+
+
+def claim_job(worker: str, db_path: str = QUEUE_DB):
+    """
+    Atomically take the oldest queued job, or a running one whose worker
+    stopped sending heartbeats. Returns (job_id, info) or None.
+    """
+    conn = connect(db_path)
+    try:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', "
+            "error = COALESCE(error, 'worker stopped responding') "
+            "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+            (now - STALE_SEC, MAX_ATTEMPTS))
+        row = conn.execute(
+            "SELECT id, game_info FROM jobs "
+            "WHERE attempts < ? AND (status = 'queued' OR "
+            "(status = 'running' AND heartbeat < ?)) "
+            "ORDER BY id LIMIT 1",
+            (MAX_ATTEMPTS, now - STALE_SEC)).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, started = ?, "
+            "heartbeat = ?, attempts = attempts + 1, error = NULL "
+            "WHERE id = ?", (worker, now, now, row["id"]))
+        conn.execute("COMMIT")
+        return row["id"], json.loads(row["game_info"])
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def heartbeat(job_id: int, worker: str, db_path: str = QUEUE_DB):
+    """
+    Refresh a running job's heartbeat. This and the updates below only
+    apply while `worker` still owns the job: once reclaimed as stale it
+    belongs to its new worker.
+    """
+    with closing(connect(db_path)) as conn:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? "
+                     "AND worker = ?", (time.time(), job_id, worker))
+
+
+def finish_job(job_id: int, worker: str, timings: dict,
+               db_path: str = QUEUE_DB):
+    """Mark the job done. Returns False if another worker reclaimed it."""
+    with closing(connect(db_path)) as conn:
+        return conn.execute(
+            "UPDATE jobs SET status = 'done', finished = ?, timings = ? "
+            "WHERE id = ? AND worker = ?",
+            (time.time(), json.dumps(timings), job_id, worker)).rowcount > 0
+
+
+def fail_job(job_id: int, worker: str, error: str, db_path: str = QUEUE_DB):
+    """
+    Record a failure; the job goes back to the queue until MAX_ATTEMPTS.
+    Returns False if another worker reclaimed it.
+    """
+    with closing(connect(db_path)) as conn:
+        return conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < ? "
+            "THEN 'queued' ELSE 'failed' END, finished = ?, error = ? "
+            "WHERE id = ? AND worker = ?",
+            (MAX_ATTEMPTS, time.time(), error, job_id, worker)).rowcount > 0
+
+
+def retry_failed(db_path: str = QUEUE_DB):
+    """Put failed jobs back in the queue with fresh attempts."""
+    with closing(connect(db_path)) as conn:
+        return conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0 "
+            "WHERE status = 'failed'").rowcount
+
+
+def list_jobs(db_path: str = QUEUE_DB):
+    with closing(connect(db_path)) as conn:
+        return [dict(r) for r in conn.execute(
+            "SELECT * FROM jobs ORDER BY id")]
+
+
+class Heartbeat:
+    """Context manager that keeps a claimed job's heartbeat fresh."""
+
+    def __init__(self, job_id: int, worker: str, db_path: str = QUEUE_DB,
+                 interval: float = HEARTBEAT_SEC):
+        self.job_id = job_id
+        self.worker = worker
+        self.db_path = db_path
+        self.interval = interval
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            try:
+                heartbeat(self.job_id, self.worker, self.db_path)
+            except sqlite3.Error as e:
+                print(f"⚠️  Heartbeat for job {self.job_id} failed: {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
@@ -0,0 +1,202 @@
+import bisect
+import hashlib
+import json
+import os
+import subprocess
+
+from artifact_cache import video_digest
+
+# ======= CONFIG =======
+KEYFRAME_JSON = "data/metadata/keyframes.json"
+# A copy cut may start this many seconds before the requested start
+COPY_TOLERANCE = 0.5
+# Encoder for clips with no keyframe inside (re-encoded whole); smart-cut
+# heads use the same settings, matched to the source stream
+HEAD_ENCODE = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+               "-pix_fmt", "yuv420p", "-c:a", "aac"]
+# Copied tails are seeked this far past their keyframe, so rounding the
+# seek time can never land on the previous keyframe (and duplicate a GOP)
+SEEK_PAST_KEY = 0.001
+# Put the moov atom first in finished clips so playback can start before
+# the whole file is downloaded
+FASTSTART = ["-movflags", "+faststart"]
+# ======================
+
+# Source H.264 profiles libx264 can reproduce for a smart-cut head
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline",
+                 "Main": "main", "High": "high"}
+_sources = {}
+
+
+def scan_keyframes(video_path: str, ffprobe_path: str):
+    """Return sorted keyframe timestamps from an ffprobe packet scan
+    (demux only, nothing is decoded)."""
+    cmd = [
+        ffprobe_path,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(float(pts))
+    return sorted(keyframes)
+
+
+def load_keyframes(video_path: str, ffprobe_path: str,
+                   cache_path: str = None):
+    """
+    Keyframe index of a video, built once and cached next to the clock map
+    (KEYFRAME_JSON unless cache_path is given).
+    Returns [] (plain copy cuts) if the scan fails.
+    """
+    cache_path = cache_path or KEYFRAME_JSON
+    key = video_digest(video_path)
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("video") == key:
+            return cached["keyframes"]
+
+    print(f"Indexing keyframes of {video_path}...")
+    try:
+        keyframes = scan_keyframes(video_path, ffprobe_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️  Keyframe scan failed ({e}), using plain copy cuts.")
+        return []
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"video": key, "keyframes": keyframes}, f)
+
+    if len(keyframes) > 1:
+        gops = [b - a for a, b in zip(keyframes, keyframes[1:])]
+        print(f"{len(keyframes)} keyframes, GOP avg {sum(gops) / len(gops):.2f}s"
+              f" / max {max(gops):.2f}s")
+    return keyframes
+
+
+def probe_source(video_path: str, ffprobe_path: str):
+    """
+    Codec, profile, level, pixel format and time base of the video stream
+    (cached per video). None if ffprobe fails.
+    """
+    if video_path not in _sources:
+        cmd = [ffprobe_path, "-v", "error", "-select_streams", "v:0",
+               "-show_entries",
+               "stream=codec_name,profile,level,pix_fmt,time_base",
+               "-of", "json", video_path]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True,
+                                    check=True)
+            _sources[video_path] = json.loads(result.stdout)["streams"][0]
+        except (OSError, subprocess.CalledProcessError, ValueError,
+                KeyError, IndexError) as e:
+            print(f"⚠️  Cannot probe {video_path} ({e}), smart cuts will "
+                  f"re-encode whole clips.")
+            _sources[video_path] = None
+    return _sources[video_path]
+
+
+def head_encode(source: dict):
+    """
+    Video encoder args for a smart-cut head that can be joined to the
+    copied tail: same codec, profile, level and pixel format, with SPS/PPS
+    repeated in-band so the decoder switches to the tail's own ones at the
+    joint. None if the source can't be matched.
+    """
+    if not source or source.get("codec_name") != "h264" or \
+            source.get("profile") not in X264_PROFILES or \
+            source.get("pix_fmt") != "yuv420p":
+        return None
+    args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            "-profile:v", X264_PROFILES[source["profile"]],
+            "-pix_fmt", "yuv420p", "-x264-params", "repeat-headers=1"]
+    if (source.get("level") or 0) > 0:
+        args += ["-level", f"{source['level'] / 10:.1f}"]
+    return args
+
+
+def plan_cut(keyframes, start: float, end: float,
+             tolerance: float = COPY_TOLERANCE):
+    """
+    Decide how to cut [start, end]:
+      ("copy", t0, end)          stream copy from keyframe t0 <= start,
+                                 close enough to start (or no index)
+      ("smart", start, k, end)   re-encode [start, k), copy [k, end]
+      ("encode", start, end)     no keyframe inside the clip
+    """
+    if not keyframes:
+        return ("copy", start, end)
+
+    i = bisect.bisect_right(keyframes, start)
+    prev = keyframes[i - 1] if i > 0 else None
+    if prev is not None and start - prev <= tolerance:
+        return ("copy", prev, end)
+
+    nxt = keyframes[i] if i < len(keyframes) else None
+    if nxt is None or nxt >= end:
+        return ("encode", start, end)
+    return ("smart", start, nxt, end)
+
+
+def cut_commands(ffmpeg_path: str, video_path: str, plan, out_path: str,
+                 temp_dir: str, source: dict = None):
+    """
+    ffmpeg commands (run in order) that produce out_path for a plan.
+    Smart cuts write video-only head/tail parts to temp_dir (MKV, SPS/PPS
+    in-band), join them with the source audio copied over the whole clip,
+    then decode across the joint so a bad join fails the job. Without a
+    matchable `source` (probe_source) the clip is re-encoded instead.
+    """
+    head_args = head_encode(source)
+    if plan[0] == "smart" and head_args is None:
+        plan = ("encode", plan[1], plan[3])
+    kind = plan[0]
+    if kind == "copy":
+        _, start, end = plan
+        return [[ffmpeg_path, "-y", "-ss", f"{start:.3f}", "-to", f"{end:.3f}",
+                 "-i", video_path, "-c", "copy", *FASTSTART, out_path]]
+    if kind == "encode":
+        _, start, end = plan
+        return [[ffmpeg_path, "-y", "-ss", f"{start:.3f}", "-to", f"{end:.3f}",
+                 "-i", video_path, *HEAD_ENCODE, *FASTSTART, out_path]]
+
+    _, start, key, end = plan
+    # Parts are named after the whole output path: players cut in one batch
+    # share temp_dir and all have a stint_1.mp4
+    stem = os.path.splitext(os.path.basename(out_path))[0]
+    tag = hashlib.sha1(os.path.abspath(out_path).encode()).hexdigest()[:10]
+    base = os.path.join(temp_dir, f"{stem}_{tag}")
+    head, tail, parts = f"{base}_head.mkv", f"{base}_tail.mkv", \
+        f"{base}_parts.txt"
+    os.makedirs(temp_dir, exist_ok=True)
+    with open(parts, "w") as f:
+        for part in (head, tail):
+            escaped = os.path.abspath(part).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    timescale = []
+    if "/" in (source.get("time_base") or ""):
+        timescale = ["-video_track_timescale",
+                     source["time_base"].split("/")[1]]
+    joint = max(0.0, key - start - 1)
+    return [
+        [ffmpeg_path, "-y", "-ss", f"{start:.3f}", "-to", f"{key:.3f}",
+         "-i", video_path, "-an", *head_args, head],
+        [ffmpeg_path, "-y", "-ss", f"{key + SEEK_PAST_KEY:.3f}",
+         "-to", f"{end:.3f}", "-i", video_path, "-an", "-c:v", "copy",
+         "-bsf:v", "h264_mp4toannexb", tail],
+        [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", parts,
+         "-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", video_path,
+         "-map", "0:v:0", "-map", "1:a:0?", "-c", "copy", *timescale,
+         *FASTSTART, out_path],
+        [ffmpeg_path, "-v", "error", "-xerror", "-ss", f"{joint:.3f}",
+         "-t", "2", "-i", out_path, "-f", "null", "-"],
+    ]
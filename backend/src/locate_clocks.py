@@ -0,0 +1,185 @@
+import json
+import os
+import argparse
+import cv2
+import easyocr
+import pandas as pd
+
+from extract_clock_ocr import (
+    select_roi, parse_roi, probe_frame, write_clock_csv, START_SEC,
+    OCR_BATCH_SIZE)
+from clean_clock_csv import clock_to_seconds, smart_clean_sequence, \
+    label_periods
+from pbp_events import build_event_table, load_plays, SUB_IN, SUB_OUT
+
+# ======= CONFIG =======
+ESPN_JSON = "data/metadata/pbp.json"
+SUBS_CSV = "data/metadata/subs_intervals.csv"
+OUTPUT_CSV = "data/metadata/clock_map.csv"
+COARSE_SEC = 30
+SAMPLE_RATE = 1
+RUN_TOLERANCE = 1.5
+MAX_RETRIES = 2
+# ======================
+
+
+def period_length(period: int):
+    return 20 * 60 if period <= 2 else 5 * 60
+
+
+def game_position(period: int, seconds: float):
+    """Sortable game-time key for `seconds` remaining in `period`."""
+    return period, period_length(period) - seconds
+
+
+def period_number(half_label: str):
+    if half_label == "1st Half":
+        return 1
+    if half_label == "2nd Half":
+        return 2
+    return 2 + int(half_label.split()[-1])
+
+
+def collect_targets(player_names, subs_csv: str, pbp_json: str):
+    """Return the (period, clock_text) pairs the cutters will look up."""
+    targets = set()
+
+    if os.path.exists(subs_csv):
+        subs = pd.read_csv(subs_csv)
+        for _, row in subs[subs["player"].isin(player_names)].iterrows():
+            period = period_number(row["half"])
+            targets.add((period, str(row["start_clock"])))
+            targets.add((period, str(row["end_clock"])))
+
+    if os.path.exists(pbp_json):
+        with open(pbp_json, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        table = build_event_table(load_plays(data), player_names)
+        stats = table[~table["category"].isin([SUB_IN, SUB_OUT])]
+        for period, clock in zip(stats["period"], stats["clock"]):
+            if period and clock:
+                targets.add((period, str(clock)))
+
+    return sorted(targets, key=lambda t: game_position(
+        t[0], clock_to_seconds(t[1]) or 0))
+
+
+def locate_clocks(video_path: str, player_names,
+                  subs_csv: str = SUBS_CSV, pbp_json: str = ESPN_JSON,
+                  output_csv: str = OUTPUT_CSV, coarse_sec: int = COARSE_SEC,
+                  batch_size: int = OCR_BATCH_SIZE, roi=None):
+    """
+    Targeted alignment: read a coarse skeleton of the clock, then binary
+    search the video for the first frame showing each requested clock in
+    its period. Game time only moves forward within the video, so every
+    read narrows all later searches; reads are cached and snapped to the
+    sample grid so nearby targets share them.
+    """
+    targets = collect_targets(player_names, subs_csv, pbp_json)
+    who = ", ".join(player_names)
+    if not targets:
+        raise RuntimeError(f"No clock targets found for {who}.")
+    print(f"Locating {len(targets)} clock targets for {who}...")
+
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"❌ Cannot open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    roi = select_roi(cap, roi)
+    reader = easyocr.Reader(["en"], gpu=True)
+
+    frame_interval = max(1, int(fps * SAMPLE_RATE))
+    coarse_interval = frame_interval * max(1, int(coarse_sec / SAMPLE_RATE))
+    start_frame = int(START_SEC * fps)
+    first = start_frame - start_frame % frame_interval + frame_interval
+
+    readings = {}
+
+    def read(frame_id):
+        if frame_id not in readings:
+            readings[frame_id] = probe_frame(cap, reader, roi, frame_id,
+                                             batch_size)
+        return readings[frame_id]
+
+    # Coarse skeleton labeled by period: [(frame, seconds, period, position)]
+    coarse = [(f, read(f))
+              for f in range(first, total_frames + 1, coarse_interval)]
+    coarse = [(f, c) for f, c in coarse if c]
+    skeleton = []
+    for f, clock, half in label_periods(smart_clean_sequence(coarse)):
+        secs = clock_to_seconds(clock)
+        period = period_number(half)
+        skeleton.append((f, secs, period, game_position(period, secs)))
+    print(f"Coarse skeleton: {len(skeleton)} readings.")
+
+    def place(frame_id, lo):
+        """Label a read taken after skeleton entry `lo` with its period."""
+        secs = clock_to_seconds(read(frame_id) or "")
+        if secs is None:
+            return None
+        period = lo[2]
+        if secs > lo[1] + RUN_TOLERANCE:
+            period += 1
+        return (frame_id, secs, period, game_position(period, secs))
+
+    found = 0
+    for period, clock in targets:
+        secs = clock_to_seconds(clock)
+        if secs is None:
+            continue
+        goal = game_position(period, secs)
+
+        hi = next((i for i, e in enumerate(skeleton) if e[3] >= goal), None)
+        if hi is None:
+            continue
+        lo = max(hi - 1, 0)
+
+        # Counted only once the goal is bracketed to one sample interval;
+        # a bisection that runs out of readable frames does not count, nor
+        # does a goal before the first reading (unless it is that reading)
+        bracketed = hi > 0 or skeleton[0][3] == goal
+        while skeleton[hi][0] - skeleton[lo][0] > frame_interval:
+            mid = (skeleton[lo][0] + skeleton[hi][0]) // 2
+            mid -= mid % frame_interval
+            entry = None
+            for k in range(MAX_RETRIES + 1):
+                probe = mid + k * frame_interval
+                if probe >= skeleton[hi][0]:
+                    break
+                entry = place(probe, skeleton[lo])
+                if entry is not None:
+                    break
+            if entry is None:
+                bracketed = False
+                break
+
+            skeleton.insert(hi, entry)
+            if entry[3] < goal:
+                lo, hi = hi, hi + 1
+        if bracketed:
+            found += 1
+
+    cap.release()
+
+    results = [(f / fps, c) for f, c in sorted(readings.items()) if c]
+    print(f"\nTargeted alignment: {found}/{len(targets)} targets located "
+          f"with {len(readings)} OCR reads.")
+    write_clock_csv(output_csv, results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--player", required=True, action="append",
+                        help="Repeat for several players of the same game")
+    parser.add_argument("--roi", type=parse_roi, default=None)
+    parser.add_argument("--coarse_sec", type=int, default=COARSE_SEC)
+    parser.add_argument("--batch_size", type=int, default=OCR_BATCH_SIZE)
+    args = parser.parse_args()
+
+    locate_clocks(args.video, args.player, coarse_sec=args.coarse_sec,
+                  batch_size=args.batch_size, roi=args.roi)
@@ -1,8 +1,9 @@
 import json
 import csv
 import os
-import re
 import argparse
+from pbp_events import build_event_table, load_plays, player_sub_events, \
+    SUB_IN
 
 # ===== CONFIG =====
 ESPN_JSON = None
@@ -45,57 +46,37 @@ def was_in_at_end(events, half):
     return state
 
 
-def parse_player_subs(json_path, player_name):
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def sub_events(table, player_name):
+    """A player's IN/OUT events from the pbp event table."""
+    return [{
+        "half": period_label(ev.period),
+        "action": "IN" if ev.category == SUB_IN else "OUT",
+        "clock": ev.clock or ""
+    } for ev in player_sub_events(table, player_name).itertuples()]
 
-    events = data.get("plays", []) or data.get("pbp", [])
-    player_events = []
 
-    for ev in events:
-        txt = ev.get("text", "")
-        clock_raw = ev.get("clock", "")
-        if isinstance(clock_raw, dict):
-            clock = clock_raw.get("displayValue", "")
-        else:
-            clock = clock_raw
-        period = ev.get("period", {}).get("number", None)
+def parse_player_subs(json_path, player_name, data=None, table=None):
+    """
+    Sub intervals of one player. Pass the pbp `data` to skip reading
+    json_path, or an event table already built for the roster.
+    """
+    if table is None:
+        if data is None:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        table = build_event_table(load_plays(data), [player_name])
 
-        txt_lower = txt.lower()
-        name_lower = player_name.lower()
+    return stint_intervals(sub_events(table, player_name))
 
-        if f"{name_lower} subbing in" in txt_lower:
-            player_events.append({
-                "half": period_label(period),
-                "action": "IN",
-                "clock": clock
-            })
 
-        elif f"{name_lower} subbing out" in txt_lower:
-            player_events.append({
-                "half": period_label(period),
-                "action": "OUT",
-                "clock": clock
-            })
+def parse_roster_subs(table, player_names):
+    """Sub intervals of several players (name -> intervals) from one table."""
+    return {name: stint_intervals(sub_events(table, name))
+            for name in player_names}
 
-        elif re.search(r"enters the game for", txt_lower):
-            match = re.search(
-                r"(.+?) enters the game for (.+)", txt, re.IGNORECASE)
-            if match:
-                player_in, player_out = match.groups()
-                if player_out.strip().lower() == name_lower:
-                    player_events.append({
-                        "half": period_label(period),
-                        "action": "OUT",
-                        "clock": clock
-                    })
-                elif player_in.strip().lower() == name_lower:
-                    player_events.append({
-                        "half": period_label(period),
-                        "action": "IN",
-                        "clock": clock
-                    })
 
+def stint_intervals(player_events):
+    """Turn a player's IN/OUT events into (half, start, end) intervals."""
     player_events.sort(key=lambda e: (e["half"], -clock_to_sec(e["clock"])))
 
     intervals = []
@@ -162,16 +143,23 @@ def parse_player_subs(json_path, player_name):
 
 
 def save_subs(intervals, out_path, player_name):
+    save_roster_subs({player_name: intervals}, out_path)
+
+
+def save_roster_subs(player_intervals: dict, out_path):
+    """Write the intervals of several players (name -> intervals) to one CSV."""
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["player", "half", "start_clock", "end_clock"])
-        for e in intervals:
-            writer.writerow(
-                [player_name, e["half"], e["start_clock"], e["end_clock"]])
-
-    print(
-        f"Saved {len(intervals)} intervals for {player_name} to {out_path}")
+        for player_name, intervals in player_intervals.items():
+            for e in intervals:
+                writer.writerow(
+                    [player_name, e["half"], e["start_clock"], e["end_clock"]])
+
+    for player_name, intervals in player_intervals.items():
+        print(
+            f"Saved {len(intervals)} intervals for {player_name} to {out_path}")
 
 
 if __name__ == "__main__":
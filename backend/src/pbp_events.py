@@ -0,0 +1,162 @@
+import re
+import pandas as pd
+
+from clock_index import clock_to_seconds
+
+# ======= CONFIG =======
+SUB_IN = "sub_in"
+SUB_OUT = "sub_out"
+EVENT_COLUMNS = ["play", "period", "clock", "clock_sec", "actor",
+                 "category", "text"]
+# ======================
+
+ENTERS_RE = re.compile(r"(.+?) enters the game for (.+)", re.IGNORECASE)
+
+
+def load_plays(data: dict):
+    return data.get("plays", []) or data.get("pbp", [])
+
+
+def play_clock(play: dict):
+    """The play's clock display value ('M:SS' or 'SS.f')."""
+    clock = play.get("clock")
+    if isinstance(clock, dict):
+        return clock.get("displayValue")
+    return clock
+
+
+def play_categories(text: str, p: str):
+    """Stat categories of lowercased play `text` for lowercased player `p`."""
+    # Skip free throws
+    if "free throw" in text:
+        return []
+
+    cats = []
+
+    # Assists
+    if f"assisted by {p}" in text:
+        cats.append("assists")
+
+    # Made/Missed shots
+    if f"{p} made" in text or f"{p} missed" in text:
+        made = "made" in text
+        if "three point" in text:
+            cats += ["3pt_made" if made else "3pt_missed", "3pt_all"]
+        elif any(k in text for k in ["jumper", "layup", "dunk", "tip"]):
+            cats += ["2pt_made" if made else "2pt_missed", "2pt_all"]
+
+        cats += ["made_shots" if made else "missed_shots", "all_shots"]
+
+    # Rebounds
+    if "defensive rebound" in text:
+        cats += ["def_rebound", "rebounds"]
+    elif "offensive rebound" in text:
+        cats += ["off_rebound", "rebounds"]
+
+    # Blocks
+    if "block" in text:
+        cats.append("blocks")
+
+    # Steals
+    if f"{p} steal" in text:
+        cats.append("steals")
+
+    # Turnovers
+    if "turnover" in text or "lost the ball" in text:
+        cats.append("turnovers")
+
+    # Fouls
+    if f"foul on {p}" in text or f"{p} foul" in text:
+        cats.append("fouls")
+
+    return sorted(set(cats))
+
+
+def categorize_play(play, player_name):
+    text = play.get("text", "").lower()
+    if not text or player_name.lower() not in text:
+        return []
+    return play_categories(text, player_name.lower())
+
+
+def name_matcher(names):
+    """
+    One compiled regex matching any of the (lowercased) names, longest
+    first, so a play is scanned once however many players are tracked.
+    Matches are reported through a lookahead, so names may overlap.
+    """
+    alternatives = sorted({n.lower() for n in names}, key=len, reverse=True)
+    return re.compile(
+        "(?=(" + "|".join(re.escape(n) for n in alternatives) + "))")
+
+
+def build_event_table(plays, names):
+    """
+    One pass over the play-by-play for every player in `names`.
+    Returns a DataFrame with a row per (play, actor, category): the stat
+    categories of categorize_play plus SUB_IN / SUB_OUT, with the period,
+    clock text and clock seconds of the play.
+    """
+    if not names:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    by_lower = {n.lower(): n for n in names}
+    matcher = name_matcher(names)
+    rows = []
+
+    for idx, play in enumerate(plays):
+        text = play.get("text", "")
+        lower = text.lower()
+        if not lower:
+            continue
+        found = list(dict.fromkeys(m.group(1)
+                                   for m in matcher.finditer(lower)))
+        if not found:
+            continue
+
+        period = (play.get("period", {}) or {}).get("number")
+        clock = play_clock(play)
+        try:
+            clock_sec = clock_to_seconds(clock)
+        except (TypeError, ValueError):
+            clock_sec = None
+
+        def add(actor, category):
+            rows.append((idx, period, clock, clock_sec, by_lower[actor],
+                         category, text))
+
+        entering = ENTERS_RE.search(text)
+        for p in found:
+            if f"{p} subbing in" in lower:
+                add(p, SUB_IN)
+            elif f"{p} subbing out" in lower:
+                add(p, SUB_OUT)
+            elif entering:
+                player_in, player_out = entering.groups()
+                if player_out.strip().lower() == p:
+                    add(p, SUB_OUT)
+                elif player_in.strip().lower() == p:
+                    add(p, SUB_IN)
+
+        for p in found:
+            for category in play_categories(lower, p):
+                add(p, category)
+
+    # object dtype keeps periods as ints even when one is missing
+    table = pd.DataFrame(rows, columns=EVENT_COLUMNS, dtype=object)
+    table["play"] = table["play"].astype(int)
+    table["clock_sec"] = table["clock_sec"].astype(float)
+    return table
+
+
+def player_stat_events(table, player_name):
+    """A player's stat rows (no subs) in play order."""
+    rows = table[(table["actor"] == player_name)
+                 & ~table["category"].isin([SUB_IN, SUB_OUT])]
+    return rows.sort_values("play", kind="stable")
+
+
+def player_sub_events(table, player_name):
+    """A player's SUB_IN / SUB_OUT rows in play order."""
+    rows = table[(table["actor"] == player_name)
+                 & table["category"].isin([SUB_IN, SUB_OUT])]
+    return rows.sort_values("play", kind="stable")
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ======= CONFIG =======
+MAX_STAGES = 4
+# ======================
+
+
+class Stage:
+    """
+    One pipeline step. func is called with the artifacts named in `inputs`
+    as keyword arguments and its return value is stored as `output`
+    (defaults to the stage name).
+    """
+
+    def __init__(self, name: str, func, inputs=(), output: str = None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.output = output or name
+
+
+def _timed(stage: Stage, inputs: dict):
+    start = time.perf_counter()
+    try:
+        return stage.func(**inputs), time.perf_counter() - start
+    except Exception as e:
+        e.elapsed = time.perf_counter() - start
+        raise
+
+
+def run_pipeline(stages, max_workers: int = MAX_STAGES):
+    """
+    Run stages in-process as soon as their inputs exist, independent stages
+    concurrently on a thread pool. Artifacts are passed in memory.
+    Returns (artifacts, timings); if a stage fails, nothing depending on it
+    starts, running stages finish and a RuntimeError is raised.
+    """
+    produced = {s.output for s in stages}
+    for stage in stages:
+        missing = [i for i in stage.inputs if i not in produced]
+        if missing:
+            raise ValueError(f"Stage {stage.name} needs unknown {missing}")
+
+    artifacts, timings = {}, {}
+    pending = list(stages)
+    running = {}
+    failure = None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            ready = [s for s in pending
+                     if all(i in artifacts for i in s.inputs)]
+            for stage in ready if failure is None else []:
+                pending.remove(stage)
+                print(f"\n▶ {stage.name}")
+                inputs = {i: artifacts[i] for i in stage.inputs}
+                running[pool.submit(_timed, stage, inputs)] = stage
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage = running.pop(fut)
+                try:
+                    artifacts[stage.output], timings[stage.name] = \
+                        fut.result()
+                    print(f"✔ {stage.name} ({timings[stage.name]:.1f}s)")
+                except Exception as e:
+                    timings[stage.name] = getattr(e, "elapsed", 0.0)
+                    print(f"❌ {stage.name} failed: {e}")
+                    failure = failure or (stage.name, e)
+
+    print("\nStage timings:")
+    for name, secs in timings.items():
+        print(f"  {name:<12} {secs:8.1f}s")
+
+    if failure:
+        name, e = failure
+        raise RuntimeError(f"{name} failed: {e}") from e
+    if pending:
+        raise RuntimeError(
+            f"Stages never ran: {', '.join(s.name for s in pending)}")
+    return artifacts, timings
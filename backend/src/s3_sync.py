@@ -0,0 +1,163 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from tqdm import tqdm
+
+# ======= CONFIG =======
+# Multipart part size (and threshold): fewer, larger parts for video
+CHUNK_SIZE = 16 * 1024 * 1024
+# Files uploaded at once, and parts in flight per file
+FILE_WORKERS = 4
+PART_CONCURRENCY = 4
+# Object metadata key holding the local sha256 of the uploaded file
+HASH_META = "sha256"
+# ======================
+
+# Served straight from the bucket, so objects need a real Content-Type
+# (browsers refuse HLS playlists and segments sent as octet-stream)
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+
+
+def local_digests(path, chunk_size: int = CHUNK_SIZE):
+    """
+    Return (sha256, etag) of a file in one read: etag is what S3 reports
+    for it when uploaded with this chunk size (plain MD5 below the
+    multipart threshold, MD5 of the part MD5s + "-<parts>" above it).
+    """
+    sha = hashlib.sha256()
+    whole = hashlib.md5()
+    parts = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+            whole.update(chunk)
+            parts.append(hashlib.md5(chunk).digest())
+
+    if os.path.getsize(path) < chunk_size:
+        etag = whole.hexdigest()
+    else:
+        etag = f"{hashlib.md5(b''.join(parts)).hexdigest()}-{len(parts)}"
+    return sha.hexdigest(), etag
+
+
+class S3Sync:
+    """
+    Concurrent uploader that skips objects whose content is already
+    stored. Takes any boto3-compatible S3 client, so it runs the same
+    against B2, MinIO or moto.
+    """
+
+    def __init__(self, client, bucket: str, url_for=None,
+                 max_workers: int = FILE_WORKERS):
+        self.client = client
+        self.bucket = bucket
+        self.url_for = url_for or (lambda key: key)
+        self.max_workers = max_workers
+        self.config = TransferConfig(
+            multipart_threshold=CHUNK_SIZE, multipart_chunksize=CHUNK_SIZE,
+            max_concurrency=PART_CONCURRENCY, use_threads=True)
+
+    def remote_matches(self, key: str, sha: str, etag: str):
+        """True if `key` exists with the same content hash (or ETag)."""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey",
+                                               "NotFound"):
+                return False
+            raise
+        remote_sha = head.get("Metadata", {}).get(HASH_META)
+        if remote_sha:
+            return remote_sha == sha
+        return head.get("ETag", "").strip('"') == etag
+
+    def upload(self, local, key: str, extra_args: dict = None):
+        """Upload one file unless unchanged. Returns {key, url, skipped}."""
+        sha, etag = local_digests(local)
+        skipped = self.remote_matches(key, sha, etag)
+        if not skipped:
+            args = dict(extra_args or {})
+            args["Metadata"] = {**args.get("Metadata", {}), HASH_META: sha}
+            content_type = mimetypes.guess_type(str(local))[0]
+            if content_type:
+                args.setdefault("ContentType", content_type)
+            self.client.upload_file(str(local), self.bucket, key,
+                                    ExtraArgs=args, Config=self.config)
+        return {"key": key, "url": self.url_for(key), "skipped": skipped}
+
+    def upload_many(self, items, desc: str = "Uploading"):
+        """
+        Upload (local, key) or (local, key, extra_args) items on a thread
+        pool. Returns key -> result; raises if any upload failed, after the
+        others are done.
+        """
+        results, failed = {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            futures = {pool.submit(self.upload, *item): item[1]
+                       for item in items}
+            for fut in tqdm(as_completed(futures), total=len(futures),
+                            desc=desc, ncols=80):
+                key = futures[fut]
+                try:
+                    results[key] = fut.result()
+                except Exception as e:
+                    failed[key] = e
+                    print(f"\n❌ Upload of {key} failed: {e}")
+
+        sent = sum(1 for r in results.values() if not r["skipped"])
+        print(f"Uploaded {sent} files, skipped {len(results) - sent} "
+              f"unchanged.")
+        if failed:
+            raise RuntimeError(f"{len(failed)} uploads failed: "
+                               f"{', '.join(sorted(failed))}")
+        return results
+
+
+class UploadQueue:
+    """
+    Background uploader for files finished while others are still being
+    produced: put() returns at once, drain() waits for everything sent.
+    """
+
+    def __init__(self, sync: S3Sync):
+        self.sync = sync
+        self.pool = ThreadPoolExecutor(max_workers=max(1, sync.max_workers))
+        self.lock = threading.Lock()
+        self.futures = {}
+
+    def put(self, local, key: str, extra_args: dict = None):
+        """Queue one upload; a key put twice is only sent once."""
+        with self.lock:
+            if key not in self.futures:
+                self.futures[key] = self.pool.submit(
+                    self.sync.upload, local, key, extra_args)
+
+    def drain(self):
+        """
+        Wait for every queued upload. Returns key -> result; raises if any
+        failed, after the others are done.
+        """
+        results, failed = {}, {}
+        with self.lock:
+            futures = dict(self.futures)
+        for key, fut in futures.items():
+            try:
+                results[key] = fut.result()
+            except Exception as e:
+                failed[key] = e
+                print(f"\n❌ Upload of {key} failed: {e}")
+        self.pool.shutdown()
+
+        sent = sum(1 for r in results.values() if not r["skipped"])
+        print(f"Uploaded {sent} files while cutting, skipped "
+              f"{len(results) - sent} unchanged.")
+        if failed:
+            raise RuntimeError(f"{len(failed)} uploads failed: "
+                               f"{', '.join(sorted(failed))}")
+        return results
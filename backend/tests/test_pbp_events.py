@@ -0,0 +1,102 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from pbp_events import (SUB_IN, SUB_OUT, build_event_table,  # noqa: E402
+                        categorize_play)
+
+# "Jo Smith" is a prefix of "Jo Smithson": the case the table treats
+# differently from the old per-player substring checks
+PLAYERS = ["Jo Smith", "Jo Smithson", "Ann Lee", "Bo Diaz"]
+OTHERS = ["Cy Young", "Ed Park"]
+TEMPLATES = [
+    "{a} made Jumper. Assisted by {b}.",
+    "{a} missed Three Point Jumper.",
+    "{a} made Layup.",
+    "{a} Defensive Rebound.",
+    "{a} Offensive Rebound.",
+    "{a} Block.",
+    "{a} Steal.",
+    "{a} Turnover.",
+    "Foul on {a}.",
+    "{a} made Free Throw.",
+    "{a} subbing in for Team.",
+    "{a} subbing out for Team.",
+    "{a} enters the game for {b}",
+]
+
+
+def synthetic_plays(n=900, seed=17):
+    rng = random.Random(seed)
+    names = PLAYERS + OTHERS
+    plays = []
+    for i in range(n):
+        a, b = rng.sample(names, 2)
+        plays.append({"text": rng.choice(TEMPLATES).format(a=a, b=b),
+                      "period": {"number": 1 + i * 2 // n},
+                      "clock": {"displayValue": f"{19 - i % 20}:00"}})
+    return plays
+
+
+def legacy_events(plays, player_name):
+    """The per-player scan the event table replaced (categories + subs)."""
+    p = player_name.lower()
+    rows = []
+    for idx, play in enumerate(plays):
+        text = play["text"]
+        lower = text.lower()
+        if f"{p} subbing in" in lower:
+            rows.append((idx, SUB_IN))
+        elif f"{p} subbing out" in lower:
+            rows.append((idx, SUB_OUT))
+        elif "enters the game for" in lower:
+            player_in, player_out = lower.split(" enters the game for ", 1)
+            if player_out.strip() == p:
+                rows.append((idx, SUB_OUT))
+            elif player_in.strip() == p:
+                rows.append((idx, SUB_IN))
+        rows += [(idx, c) for c in categorize_play(play, player_name)]
+    return sorted(rows)
+
+
+def table_events(table, player_name):
+    rows = table[table["actor"] == player_name]
+    return sorted(zip(rows["play"], rows["category"]))
+
+
+def mentions_longer_name(text, player_name):
+    """The play names a longer tracked player that contains player_name."""
+    lower = text.lower()
+    return any(other != player_name and player_name.lower() in other.lower()
+               and other.lower() in lower for other in PLAYERS)
+
+
+def test_table_matches_per_player_scan():
+    plays = synthetic_plays()
+    table = build_event_table(plays, PLAYERS)
+    for name in PLAYERS:
+        # Plays naming a longer overlapping player are compared separately
+        keep = {i for i, play in enumerate(plays)
+                if not mentions_longer_name(play["text"], name)}
+        legacy = [r for r in legacy_events(plays, name) if r[0] in keep]
+        new = [r for r in table_events(table, name) if r[0] in keep]
+        assert new == legacy, name
+
+
+def test_prefix_name_is_not_credited_with_longer_names_plays():
+    plays = [{"text": "Jo Smithson Block.", "period": {"number": 1},
+              "clock": {"displayValue": "10:00"}}]
+    # The old substring check credited "Jo Smith" with the block too
+    assert categorize_play(plays[0], "Jo Smith") == ["blocks"]
+    table = build_event_table(plays, PLAYERS)
+    assert table_events(table, "Jo Smith") == []
+    assert table_events(table, "Jo Smithson") == [(0, "blocks")]
+
+
+def test_single_player_table_matches_per_player_scan():
+    plays = synthetic_plays(seed=5)
+    for name in PLAYERS:
+        table = build_event_table(plays, [name])
+        assert table_events(table, name) == legacy_events(plays, name), name
@@ -0,0 +1,75 @@
+import os
+import sys
+from pathlib import Path
+
+import boto3
+import pytest
+
+moto = pytest.importorskip("moto")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from s3_sync import CHUNK_SIZE, HASH_META, S3Sync, local_digests  # noqa: E402
+
+BUCKET = "clips-bucket"
+
+
+@pytest.fixture
+def sync(monkeypatch):
+    for var in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY",
+                "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(var, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Sync(client, BUCKET, max_workers=2)
+
+
+def test_unchanged_object_is_skipped(sync, tmp_path):
+    clip = tmp_path / "stint_1.mp4"
+    clip.write_bytes(b"clip" * 1000)
+
+    first = sync.upload(clip, "p/g/stints/stint_1.mp4")
+    second = sync.upload(clip, "p/g/stints/stint_1.mp4")
+    assert not first["skipped"]
+    assert second["skipped"]
+
+    head = sync.client.head_object(Bucket=BUCKET, Key="p/g/stints/stint_1.mp4")
+    assert head["Metadata"][HASH_META] == local_digests(clip)[0]
+    assert head["ContentType"] == "video/mp4"
+
+    clip.write_bytes(b"edit" * 1000)
+    assert not sync.upload(clip, "p/g/stints/stint_1.mp4")["skipped"]
+
+
+def test_multipart_etag_matches_without_hash_metadata(sync, tmp_path):
+    reel = tmp_path / "all_shots.mp4"
+    reel.write_bytes(os.urandom(CHUNK_SIZE + 1024))
+    key = "p/g/stats/all_shots.mp4"
+    # Uploaded by an older run: no sha256 metadata, only the multipart ETag
+    sync.client.upload_file(str(reel), BUCKET, key, Config=sync.config)
+
+    head = sync.client.head_object(Bucket=BUCKET, Key=key)
+    assert HASH_META not in head.get("Metadata", {})
+    assert head["ETag"].strip('"') == local_digests(reel)[1]
+    assert local_digests(reel)[1].endswith("-2")
+    assert sync.upload(reel, key)["skipped"]
+
+    with open(reel, "r+b") as f:
+        f.seek(CHUNK_SIZE + 10)
+        f.write(b"changed")
+    assert not sync.upload(reel, key)["skipped"]
+
+
+def test_upload_many_reports_skips(sync, tmp_path):
+    files = []
+    for n in range(3):
+        path = tmp_path / f"stint_{n}.mp4"
+        path.write_bytes(bytes([n]) * 100)
+        files.append((path, f"p/g/stints/stint_{n}.mp4"))
+
+    sync.upload_many(files[:2])
+    results = sync.upload_many(files)
+    assert [results[key]["skipped"] for _, key in files] == \
+        [True, True, False]
@@ -6,6 +6,11 @@ from dotenv import load_dotenv
 import boto3
 from urllib.parse import quote
 
+# upload_videos puts src on sys.path; import s3_sync by the same bare name
+# so it is loaded (and its mimetypes registered) only once
+from upload_videos import STORAGE, publish_indexes
+from s3_sync import S3Sync
+
 # ===== CONFIG =====
 GAME_INFO_PATH = "game_info.json"
 
@@ -46,9 +51,11 @@ def b2_url(key):
     return f"{B2_DOWNLOAD_BASE}/{B2_BUCKET}/{quote(key)}"
 
 
+sync = S3Sync(s3, B2_BUCKET, b2_url)
+
+
 def upload(local: Path, key: str) -> str:
-    s3.upload_file(str(local), B2_BUCKET, key)
-    return b2_url(key)
+    return sync.upload(local, key)["url"]
 
 
 def parse_game_name(game_name: str):
@@ -160,8 +167,9 @@ def main():
 
     print("Extracted teams and named logos from ESPN JSON")
 
+    # Only the player's own line is kept; the whole boxscore made every
+    # summary.json several times larger than the page needs
     boxscore = pbp.get("boxscore", {}).get("players", [])
-    summary["metadata"]["boxscore"] = boxscore
 
     player_totals = {}
     for team in boxscore:
@@ -193,6 +201,10 @@ def main():
     upload(manifest_local, key)
     print(f"\n🏁 Summary uploaded: {b2_url(key)}")
 
+    # Refresh the compact indexes now that logos and totals are known
+    publish_indexes(sync, PLAYER_NAME, GAME_NAME, LOCAL_PBP_JSON.parent,
+                    PLAYER_ID, info.get("storage", STORAGE))
+
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,28 @@
 import os
 import json
+import sys
 from pathlib import Path
 from urllib.parse import quote
 from dotenv import load_dotenv
 import boto3
 
-# ====== CONFIG ======
-GAME_INFO_PATH = "game_info.json"
+# The src modules import each other by bare name (hls_package -> ffmpeg_jobs)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
 
-with open(GAME_INFO_PATH, "r", encoding="utf-8") as f:
-    info = json.load(f)
+import game_index  # noqa: E402
+import game_proxy  # noqa: E402
+import hls_package  # noqa: E402
+from s3_sync import S3Sync, UploadQueue  # noqa: E402
 
-PLAYER_NAME = info["player_name"]
-GAME_NAME = info["game_name"]
+# ====== CONFIG ======
+GAME_INFO_PATH = "game_info.json"
+PROCESSED_DIR = Path("data/processed")
+METADATA_DIR = Path("data/metadata")
+# "clips": upload every stint and reel; "proxy": upload the game proxy and
+# the time index instead (game_info "storage" overrides, as in main.py)
+STORAGE = "clips"
 # =====================
 
-LOCAL_BASE = Path("data/processed") / PLAYER_NAME.replace(" ", "_") / GAME_NAME
-LOCAL_STINTS_DIR = LOCAL_BASE / "intervals"
-LOCAL_STATS_DIR = LOCAL_BASE / "stats"
-LOCAL_METADATA_DIR = LOCAL_BASE / "metadata"
-
-LOCAL_SUBS_INTERVALS = Path("data/metadata/subs_intervals.csv")
-LOCAL_PBP_JSON = Path("data/metadata/pbp.json")
-
 CANDIDATE_STATS = [
     "made_shots", "missed_shots", "all_shots", "assists",
     "blocks", "steals", "turnovers", "rebounds",
@@ -36,24 +36,56 @@ B2_S3_ENDPOINT = os.getenv("B2_S3_ENDPOINT")
 B2_REGION = os.getenv("B2_REGION")
 B2_KEY_ID = os.getenv("B2_KEY_ID")
 B2_APPLICATION_KEY = os.getenv("B2_APPLICATION_KEY")
-B2_DOWNLOAD_BASE = os.getenv("B2_DOWNLOAD_BASE").rstrip("/")
-
-s3 = boto3.client(
-    "s3",
-    endpoint_url=B2_S3_ENDPOINT,
-    aws_access_key_id=B2_KEY_ID,
-    aws_secret_access_key=B2_APPLICATION_KEY,
-    region_name=B2_REGION,
-)
+B2_DOWNLOAD_BASE = os.getenv("B2_DOWNLOAD_BASE", "").rstrip("/")
 
 
 def b2_url(key: str) -> str:
     return f"{B2_DOWNLOAD_BASE}/{B2_BUCKET}/{quote(key)}"
 
 
-def upload(local: Path, key: str) -> str:
-    s3.upload_file(str(local), B2_BUCKET, key)
-    return b2_url(key)
+def make_sync():
+    """S3Sync against the B2 bucket configured in .env."""
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=B2_S3_ENDPOINT,
+        aws_access_key_id=B2_KEY_ID,
+        aws_secret_access_key=B2_APPLICATION_KEY,
+        region_name=B2_REGION,
+    )
+    return S3Sync(s3, B2_BUCKET, b2_url)
+
+
+def player_base(player_name: str, game_name: str):
+    return PROCESSED_DIR / player_name.replace(" ", "_") / game_name
+
+
+def proxy_object_key(game_name: str):
+    """The game proxy is shared by every player of the game."""
+    return f"proxies/{game_name}.mp4"
+
+
+def object_key(local: Path):
+    """
+    Bucket key of a clip under PROCESSED_DIR:
+    <Player>/<game>/intervals/x.mp4 -> <Player>/<game>/stints/x.mp4,
+    stats clips keep their folder, and HLS packages follow their clip
+    (.../stints/hls/x/index.m3u8). None for files that are not uploaded.
+    """
+    parts = Path(local).resolve().relative_to(
+        PROCESSED_DIR.resolve()).parts
+    if len(parts) == 6 and parts[3] == hls_package.HLS_DIR:
+        # HLS package of a clip: <folder>/hls/<clip>/<file>
+        clip, name = parts[4:]
+        clip_key = object_key(Path(local).parents[2] / f"{clip}.mp4")
+        return clip_key and f"{clip_key.rsplit('/', 1)[0]}/hls/{clip}/{name}"
+    if len(parts) != 4:
+        return None
+    player_key, game, folder, name = parts
+    if folder == "intervals" and name.startswith("stint_"):
+        return f"{player_key}/{game}/stints/{name}"
+    if folder == "stats" and Path(name).stem in CANDIDATE_STATS:
+        return f"{player_key}/{game}/stats/{name}"
+    return None
 
 
 def enumerate_stints(stints_dir: Path):
@@ -74,58 +106,215 @@ def find_stat_videos(stats_dir: Path):
     return out
 
 
-def main():
-    player_key = PLAYER_NAME.replace(" ", "_")
-    base_prefix = f"{player_key}/{GAME_NAME}"
+def publish_clip(queue: UploadQueue):
+    """
+    run_jobs on_done callback that queues every finished stint / reel (and
+    its HLS package) for upload while the rest are still being cut.
+    """
+    def on_done(path, result):
+        if result["returncode"] != 0 or not object_key(path):
+            return
+        for f in [path] + hls_package.hls_files(path):
+            queue.put(f, object_key(f))
+    return on_done
+
+
+def publish_indexes(sync: S3Sync, player_name: str, game_name: str,
+                    metadata_dir: Path = METADATA_DIR, player_id: str = None,
+                    storage: str = STORAGE):
+    """
+    Build the game's compact game_index.json from the local manifest,
+    summary and play-by-play and upload it gzip-encoded, so pages load
+    without pbp.json. The player's player_index.json is then rebuilt from
+    every game index in the bucket (not read-modified-written), so batch
+    workers publishing other games at the same time don't drop each
+    other's cards.
+    """
+    local_meta = player_base(player_name, game_name) / "metadata"
+    manifest_local = local_meta / "manifest.json"
+    pbp_local = Path(metadata_dir) / "pbp.json"
+    if not manifest_local.exists() or not pbp_local.exists():
+        print("No manifest.json or pbp.json yet, skipping the indexes.")
+        return
+
+    manifest = json.loads(manifest_local.read_text(encoding="utf-8"))
+    summary_local = local_meta / "summary.json"
+    summary = None
+    if summary_local.exists():
+        summary = json.loads(summary_local.read_text(encoding="utf-8"))
+    pbp = json.loads(pbp_local.read_text(encoding="utf-8"))
+    time_index = None
+    if storage == "proxy":
+        if not manifest.get("proxy"):
+            print("The manifest has no proxy yet, skipping the indexes.")
+            return
+        time_index = json.loads((local_meta / game_proxy.TIME_INDEX)
+                                .read_text(encoding="utf-8"))
+
+    index = game_index.build_game_index(
+        pbp, manifest, Path(metadata_dir) / "subs_intervals.csv",
+        player_base(player_name, game_name) / "stats" / "windows.json",
+        summary, player_id, time_index)
+    player_key = player_name.replace(" ", "_")
+    gkey = f"{player_key}/{game_name}/metadata/{game_index.GAME_INDEX}"
+    sync.upload(
+        game_index.write_gzip_json(index, local_meta / game_index.GAME_INDEX),
+        gkey, game_index.upload_args(game_index.GAME_INDEX_CACHE))
+    print(f"Uploaded game index: {b2_url(gkey)}")
+
+    pkey = f"{player_key}/{game_index.PLAYER_INDEX}"
+    players_index = None
+    for key in game_index.list_game_indexes(sync, player_key):
+        other = None if key == gkey else \
+            game_index.fetch_remote_index(sync, key)
+        if other:
+            players_index = game_index.merge_player_index(
+                players_index, other, b2_url(key))
+    players_index = game_index.merge_player_index(
+        players_index, index, b2_url(gkey))
+    local_player = PROCESSED_DIR / player_key / game_index.PLAYER_INDEX
+    sync.upload(
+        game_index.write_gzip_json(players_index, local_player),
+        pkey, game_index.upload_args(game_index.PLAYER_INDEX_CACHE))
+    print(f"Uploaded player index ({len(players_index['games'])} games): "
+          f"{b2_url(pkey)}")
+
+
+def hls_entry(files, uploaded: dict):
+    """Manifest fields of a clip's HLS package: playlist URL and key."""
+    if not files:
+        return {}
+    key = object_key(files[-1])
+    return {"hls": uploaded[key]["url"], "hls_key": key,
+            "hls_segments": len(files) - 2}
+
+
+def upload_player(sync: S3Sync, player_name: str, game_name: str,
+                  metadata_dir: Path = METADATA_DIR, uploaded: dict = None,
+                  player_id: str = None, storage: str = STORAGE):
+    """
+    Upload a player's stints, stat reels and metadata, then the manifest;
+    with proxy storage the game proxy and time index replace the clips.
+    `uploaded` holds results (key -> result) of clips already sent while
+    cutting; those are not checked again. The manifest goes up last and
+    only if every object it lists is confirmed. Returns `uploaded` with
+    this player's objects added (the game proxy is shared).
+    """
+    uploaded = dict(uploaded or {})
+    local_base = player_base(player_name, game_name)
+    stints_dir = local_base / "intervals"
+    stats_dir = local_base / "stats"
+    base_prefix = f"{player_name.replace(' ', '_')}/{game_name}"
     manifest = {
-        "player": PLAYER_NAME,
-        "game": GAME_NAME,
+        "player": player_name,
+        "game": game_name,
         "stints": [],
         "stats": {},
         "metadata": {}
     }
 
-    if LOCAL_STINTS_DIR.exists():
-        stints = enumerate_stints(LOCAL_STINTS_DIR)
-        for idx, f in enumerate(stints, start=1):
-            key = f"{base_prefix}/stints/{f.name}"
-            url = upload(f, key)
-            manifest["stints"].append(
-                {"n": idx, "file": f.name, "key": key, "url": url})
-            print(f"[stint {idx}] {url}")
-    else:
-        print("No stints folder found, skipping.")
-
-    if LOCAL_STATS_DIR.exists():
-        stats = find_stat_videos(LOCAL_STATS_DIR)
-        for cat, f in stats.items():
-            key = f"{base_prefix}/stats/{cat}.mp4"
-            url = upload(f, key)
-            manifest["stats"][cat] = {"file": f.name, "key": key, "url": url}
-            print(f"[stat {cat}] {url}")
+    # Proxy storage: the clips are time ranges into one game proxy. A time
+    # index left by an earlier proxy run would be stale in clips mode.
+    use_proxy = storage == "proxy"
+    proxy = Path(game_proxy.proxy_path(game_name))
+    time_index = local_base / "metadata" / game_proxy.TIME_INDEX
+    if use_proxy and not (proxy.exists() and time_index.exists()):
+        raise RuntimeError(f"❌ Proxy storage needs {proxy} and {time_index}")
+    if not use_proxy:
+        time_index.unlink(missing_ok=True)
+
+    stints = []
+    stats = {}
+    if use_proxy:
+        print("Proxy storage, skipping stint and stat clips.")
     else:
-        print("No stats folder found, skipping.")
-
-    for meta_file, label in [
-        (LOCAL_SUBS_INTERVALS, "subs_intervals_csv"),
-        (LOCAL_PBP_JSON, "pbp_json")
-    ]:
-        if meta_file.exists():
-            key = f"{base_prefix}/metadata/{meta_file.name}"
-            url = upload(meta_file, key)
-            manifest["metadata"][label] = {"key": key, "url": url}
-            print(f"[meta {label}] {url}")
-
-    manifest_local = LOCAL_METADATA_DIR / "manifest.json"
+        if stints_dir.exists():
+            stints = enumerate_stints(stints_dir)
+        else:
+            print("No stints folder found, skipping.")
+        if stats_dir.exists():
+            stats = find_stat_videos(stats_dir)
+        else:
+            print("No stats folder found, skipping.")
+
+    metas = [(meta_file, label) for meta_file, label in [
+        (metadata_dir / "subs_intervals.csv", "subs_intervals_csv"),
+        (metadata_dir / "pbp.json", "pbp_json"),
+        (stats_dir / "windows.json", "highlight_windows_json"),
+        (time_index, "time_index_json")
+    ] if meta_file.exists()]
+
+    clips = stints + list(stats.values())
+    packages = {f: hls_package.hls_files(str(f)) for f in clips}
+    items = [(f, object_key(f)) for f in clips]
+    items += [(p, object_key(p)) for files in packages.values() for p in files]
+    items += [(f, f"{base_prefix}/metadata/{f.name}") for f, _ in metas]
+    if use_proxy:
+        items.append((proxy, proxy_object_key(game_name)))
+    uploaded.update(sync.upload_many(
+        [item for item in items if item[1] not in uploaded]))
+
+    for idx, f in enumerate(stints, start=1):
+        key = object_key(f)
+        url = uploaded[key]["url"]
+        manifest["stints"].append(
+            {"n": idx, "file": f.name, "key": key, "url": url,
+             **hls_entry(packages[f], uploaded)})
+        print(f"[stint {idx}] {url}")
+
+    for cat, f in stats.items():
+        key = object_key(f)
+        url = uploaded[key]["url"]
+        manifest["stats"][cat] = {"file": f.name, "key": key, "url": url,
+                                  **hls_entry(packages[f], uploaded)}
+        print(f"[stat {cat}] {url}")
+
+    if use_proxy:
+        key = proxy_object_key(game_name)
+        manifest["proxy"] = {"key": key, "url": uploaded[key]["url"]}
+        print(f"[proxy] {manifest['proxy']['url']}")
+
+    for meta_file, label in metas:
+        key = f"{base_prefix}/metadata/{meta_file.name}"
+        url = uploaded[key]["url"]
+        manifest["metadata"][label] = {"key": key, "url": url}
+        print(f"[meta {label}] {url}")
+
+    manifest_local = local_base / "metadata" / "manifest.json"
     manifest_local.parent.mkdir(parents=True, exist_ok=True)
     manifest_local.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
 
     mkey = f"{base_prefix}/metadata/manifest.json"
-    upload(manifest_local, mkey)
+    sync.upload(manifest_local, mkey)
     print(f"\nUploaded manifest: {b2_url(mkey)}")
+
+    publish_indexes(sync, player_name, game_name, metadata_dir, player_id,
+                    storage)
+    return uploaded
+
+
+def main():
+    with open(GAME_INFO_PATH, "r", encoding="utf-8") as f:
+        info = json.load(f)
+
+    players = info.get("players") or [info["player_name"]]
+    # player_id belongs to the single "player_name"; rosters match by name
+    player_id = None if info.get("players") else info.get("player_id")
+    storage = info.get("storage", STORAGE)
+    if players == "roster":
+        players = [p.parent.name.replace("_", " ") for p in
+                   PROCESSED_DIR.glob(f"*/{info['game_name']}")]
+
+    sync = make_sync()
+    uploaded = {}
+    for player_name in players:
+        player_base(player_name, info["game_name"]).mkdir(
+            parents=True, exist_ok=True)
+        uploaded = upload_player(sync, player_name, info["game_name"],
+                                 uploaded=uploaded, player_id=player_id,
+                                 storage=storage)
     print("Upload complete!")
 
 
 if __name__ == "__main__":
-    LOCAL_BASE.mkdir(parents=True, exist_ok=True)
     main()
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from "react";
+import React, { useEffect, useState, useMemo, useRef, RefObject } from "react";
 import { useParams, Link } from "react-router-dom";
 import Papa from "papaparse";
 import "./GamePage.css";
@@ -20,6 +20,72 @@ interface Stint {
   end: string;
 }
 
+interface GameIndex {
+  player: string;
+  score: { away: number; home: number } | null;
+  logos: { home: string; away: string };
+  totals: Record<string, string>;
+  stints: {
+    n: number;
+    half: string;
+    start: string;
+    end: string;
+    url?: string;
+    hls?: string;
+    time?: TimeRange;
+  }[];
+  reels: Record<
+    string,
+    { url?: string; hls?: string; clips?: TimeRange[]; duration: number | null }
+  >;
+  proxy?: string;
+}
+
+type TimeRange = [number, number];
+
+// Safari / iOS play HLS natively and start it faster than a full MP4;
+// elsewhere the (faststart) MP4 is used
+const nativeHls =
+  typeof document !== "undefined" &&
+  document.createElement("video").canPlayType("application/vnd.apple.mpegurl") !== "";
+
+// Proxy storage: a clip is a list of [start, end] ranges in the game proxy.
+// Seek to the first one and jump range to range, pausing after the last.
+function useClipRanges(ref: RefObject<HTMLVideoElement>, ranges?: TimeRange[]) {
+  useEffect(() => {
+    const video = ref.current;
+    if (!video || !ranges || ranges.length === 0) return;
+
+    let i = 0;
+    const seekStart = () => {
+      i = 0;
+      video.currentTime = ranges[0][0];
+    };
+    const onTime = () => {
+      if (video.currentTime < ranges[i][1]) return;
+      if (i + 1 < ranges.length) {
+        i += 1;
+        video.currentTime = ranges[i][0];
+      } else {
+        video.pause();
+      }
+    };
+    const onPlay = () => {
+      if (video.currentTime >= ranges[ranges.length - 1][1]) seekStart();
+    };
+
+    if (video.readyState >= 1) seekStart();
+    else video.addEventListener("loadedmetadata", seekStart, { once: true });
+    video.addEventListener("timeupdate", onTime);
+    video.addEventListener("play", onPlay);
+    return () => {
+      video.removeEventListener("loadedmetadata", seekStart);
+      video.removeEventListener("timeupdate", onTime);
+      video.removeEventListener("play", onPlay);
+    };
+  }, [ref, ranges]);
+}
+
 export default function GamePage() {
   const { playerSlug, gameSlug } = useParams();
   const decodedGame = decodeURIComponent(gameSlug || "");
@@ -29,6 +95,11 @@ export default function GamePage() {
   const [summary, setSummary] = useState<Summary | null>(null);
   const [manifest, setManifest] = useState<Manifest | null>(null);
   const [stints, setStints] = useState<Stint[]>([]);
+  const [stintSources, setStintSources] = useState<Record<number, string>>({});
+  const [stintRanges, setStintRanges] = useState<Record<number, TimeRange[]>>({});
+  const [reelRanges, setReelRanges] = useState<Record<string, TimeRange[]>>({});
+  const stintRef = useRef<HTMLVideoElement>(null);
+  const statRef = useRef<HTMLVideoElement>(null);
   const [activeStint, setActiveStint] = useState<number>(1);
   const [activeStat, setActiveStat] = useState<string>("");
   const [score, setScore] = useState<{ away: number; home: number }>({
@@ -122,6 +193,44 @@ export default function GamePage() {
 
   useEffect(() => {
     (async () => {
+      // One small precomputed index instead of summary + manifest + csv + pbp
+      try {
+        // B2 answers a missing file with a JSON 404 body, which parses fine
+        const res = await fetch(`${base}/metadata/game_index.json`);
+        if (!res.ok) throw new Error(`game_index.json: ${res.status}`);
+        const idx: GameIndex = await res.json();
+        setSummary({ logos: idx.logos, totals: idx.totals, player: idx.player });
+        const stats: Manifest["stats"] = {};
+        const ranges: Record<string, TimeRange[]> = {};
+        Object.entries(idx.reels).forEach(([k, r]) => {
+          stats[k] = { url: idx.proxy ?? ((nativeHls && r.hls) || r.url || "") };
+          if (r.clips) ranges[k] = r.clips;
+        });
+        setReelRanges(ranges);
+        setManifest({ stats });
+        setActiveStat(Object.keys(stats)[0]);
+        setStints(
+          idx.stints.map((st) => ({
+            id: st.n,
+            half: st.half,
+            start: st.start,
+            end: st.end,
+          }))
+        );
+        const sources: Record<number, string> = {};
+        const times: Record<number, TimeRange[]> = {};
+        idx.stints.forEach((st) => {
+          sources[st.n] = idx.proxy ?? ((nativeHls && st.hls) || st.url || "");
+          if (st.time) times[st.n] = [st.time];
+        });
+        setStintSources(sources);
+        setStintRanges(times);
+        if (idx.score) setScore(idx.score);
+        return;
+      } catch {
+        console.warn("no game_index.json, loading full metadata");
+      }
+
       try {
         const s = await (await fetch(`${base}/metadata/summary.json`)).json();
         setSummary(s);
@@ -162,8 +271,8 @@ export default function GamePage() {
   }, [base]);
 
   const stintUrl = useMemo(
-    () => `${base}/stints/stint_${activeStint}.mp4`,
-    [base, activeStint]
+    () => stintSources[activeStint] ?? `${base}/stints/stint_${activeStint}.mp4`,
+    [base, activeStint, stintSources]
   );
 
   const statUrl = useMemo(
@@ -171,6 +280,9 @@ export default function GamePage() {
     [manifest, activeStat]
   );
 
+  useClipRanges(stintRef, stintRanges[activeStint]);
+  useClipRanges(statRef, reelRanges[activeStat]);
+
   if (!summary || !manifest) return <div className="loading">Loading...</div>;
 
   const [awayTeam, homeTeam] = decodedGame.split("@").map((s) => s.trim());
@@ -219,6 +331,7 @@ export default function GamePage() {
       {/* Main stint video */}
       <div className="video-wrap large">
         <video
+          ref={stintRef}
           key={stintUrl}
           src={stintUrl}
           controls
@@ -246,6 +359,7 @@ export default function GamePage() {
       {activeStat && (
         <div className="video-wrap small">
           <video
+            ref={statRef}
             key={statUrl}
             src={statUrl}
             controls
@@ -20,6 +20,13 @@ interface Totals {
   [key: string]: string;
 }
 
+interface IndexCard {
+  game: string;
+  score: { away: number; home: number } | null;
+  logos: { home: string; away: string };
+  totals: Totals;
+}
+
 interface CardData {
   game: Game;
   logos?: { home: string; away: string };
@@ -41,8 +48,28 @@ export default function PlayerPage() {
       setPlayer(found);
       if (!found) return;
 
+      // One small aggregated index covers every game's card
+      const indexed: Record<string, IndexCard> = {};
+      try {
+        const res = await fetch(
+          `https://f005.backblazeb2.com/file/game-films/${found.slug}/player_index.json`
+        );
+        if (!res.ok) throw new Error(`player_index.json: ${res.status}`);
+        const idx = await res.json();
+        (idx.games || []).forEach((c: IndexCard) => (indexed[c.game] = c));
+      } catch {}
+
       const rows = await Promise.all(
         found.games.map(async (g) => {
+          const card = indexed[g.slug];
+          if (card)
+            return {
+              game: g,
+              logos: card.logos,
+              totals: card.totals,
+              score: card.score ?? undefined,
+            } as CardData;
+
           const base = `https://f005.backblazeb2.com/file/game-films/${found.slug}/${encodeURIComponent(
             g.slug
           )}`;